@@ -0,0 +1,43 @@
+"""add prediction rollups
+
+Revision ID: 3c1f7a92d5e4
+Revises: 8e8104876ab8
+Create Date: 2026-10-19 10:12:41.208117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c1f7a92d5e4'
+down_revision: Union[str, None] = '8e8104876ab8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('prediction_rollups',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('medicine_id', sa.Integer(), nullable=True),
+    sa.Column('region', sa.String(), nullable=True),
+    sa.Column('granularity', sa.String(length=10), nullable=False),
+    sa.Column('period', sa.String(length=10), nullable=False),
+    sa.Column('period_start', sa.DateTime(), nullable=False),
+    sa.Column('days', sa.Integer(), nullable=False),
+    sa.Column('predicted_demand', sa.Float(), nullable=True),
+    sa.Column('confidence_interval', sa.Float(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['medicine_id'], ['medicines.medicine_id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_prediction_rollups_lookup', 'prediction_rollups', ['granularity', 'region', 'period_start'], unique=False)
+    op.create_index('ix_prediction_rollups_medicine', 'prediction_rollups', ['medicine_id', 'region', 'granularity'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_prediction_rollups_medicine', table_name='prediction_rollups')
+    op.drop_index('ix_prediction_rollups_lookup', table_name='prediction_rollups')
+    op.drop_table('prediction_rollups')
@@ -0,0 +1,26 @@
+"""add prediction interval mode
+
+Revision ID: a52f8d1c6e93
+Revises: e41c6a9d2b70
+Create Date: 2026-10-19 17:26:51.904318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a52f8d1c6e93'
+down_revision: Union[str, None] = 'e41c6a9d2b70'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('predictions', sa.Column('interval_mode', sa.String(length=10), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('predictions', 'interval_mode')
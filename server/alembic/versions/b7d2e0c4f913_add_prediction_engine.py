@@ -0,0 +1,26 @@
+"""add prediction engine
+
+Revision ID: b7d2e0c4f913
+Revises: 3c1f7a92d5e4
+Create Date: 2026-10-19 11:03:27.551902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d2e0c4f913'
+down_revision: Union[str, None] = '3c1f7a92d5e4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('predictions', sa.Column('engine', sa.String(length=20), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('predictions', 'engine')
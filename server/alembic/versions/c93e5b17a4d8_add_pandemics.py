@@ -0,0 +1,36 @@
+"""add pandemics
+
+Revision ID: c93e5b17a4d8
+Revises: a52f8d1c6e93
+Create Date: 2026-10-19 21:08:13.552904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c93e5b17a4d8'
+down_revision: Union[str, None] = 'a52f8d1c6e93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The regional databases already have it from dataset/init_db.sql
+    if sa.inspect(op.get_bind()).has_table('pandemics'):
+        return
+    op.create_table('pandemics',
+    sa.Column('pandemic_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('start_date', sa.Date(), nullable=False),
+    sa.Column('end_date', sa.Date(), nullable=False),
+    sa.Column('demand_multiplier', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('pandemic_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('pandemics')
@@ -0,0 +1,139 @@
+"""partition predictions and usage history
+
+Revision ID: e41c6a9d2b70
+Revises: b7d2e0c4f913
+Create Date: 2026-10-19 15:42:08.317554
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e41c6a9d2b70'
+down_revision: Union[str, None] = 'b7d2e0c4f913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Monthly range partitions on date; PostgreSQL only, other databases keep
+# plain tables. Partitions after the first few months are created by the
+# scheduler (src/utils/partitions.py), which also converts the regional
+# databases: `python -m src.utils.partitions convert <region>`. The DDL is
+# written out here so later changes to that module do not alter this revision.
+TABLES = {
+    'predictions': ('medicine_id', 'region', 'date'),
+    'usage_history': ('medicine_id', 'date'),
+}
+COLUMN = 'date'
+# Partition columns have to be NOT NULL; these were nullable before
+NULLABLE_BEFORE = ('predictions',)
+MONTHS_AHEAD = 4
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _rows(sql: str, table: str) -> list:
+    return op.get_bind().execute(sa.text(sql), {'table': table}).all()
+
+
+def _is_partitioned(table: str) -> bool:
+    return bool(_rows(
+        "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = :table AND pg_table_is_visible(c.oid)", table
+    ))
+
+
+def _rebuild(table: str, partitioned: bool) -> None:
+    """Recreate ``table`` (partitioned or plain) and copy its rows, keeping
+    defaults, sequences, foreign keys and secondary indexes. The partitioned
+    primary key must include the partition column, so rows without a date
+    are dropped."""
+    old = f'{table}_rebuild'
+    primary_key = [row[0] for row in _rows(
+        "SELECT a.attname FROM pg_index i "
+        "JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey) "
+        "WHERE i.indrelid = CAST(:table AS regclass) AND i.indisprimary ORDER BY a.attnum", table
+    ) if row[0] != COLUMN]
+    sequences = _rows(
+        "SELECT a.attname, pg_get_serial_sequence(:table, a.attname) FROM pg_attribute a "
+        "WHERE a.attrelid = CAST(:table AS regclass) AND a.attnum > 0 AND NOT a.attisdropped "
+        "AND pg_get_serial_sequence(:table, a.attname) IS NOT NULL", table
+    )
+    foreign_keys = _rows(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = CAST(:table AS regclass) AND contype = 'f'", table
+    )
+    indexes = _rows(
+        "SELECT pg_get_indexdef(i.indexrelid), i.indisunique, "
+        "ARRAY(SELECT a.attname FROM pg_attribute a WHERE a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)) "
+        "FROM pg_index i WHERE i.indrelid = CAST(:table AS regclass) AND NOT i.indisprimary "
+        "AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid)", table
+    )
+    op.execute(f'ALTER TABLE {table} RENAME TO {old}')
+
+    like = f'(LIKE {old} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING STORAGE)'
+    if partitioned:
+        op.execute(f'CREATE TABLE {table} {like} PARTITION BY RANGE ({COLUMN})')
+        op.execute(f'ALTER TABLE {table} ALTER COLUMN {COLUMN} SET NOT NULL')
+        op.execute(f'CREATE TABLE {table}_default PARTITION OF {table} DEFAULT')
+        today = date.today().replace(day=1)
+        first = op.get_bind().execute(sa.text(f'SELECT min({COLUMN}) FROM {old}')).scalar()
+        month = date(first.year, first.month, 1) if first else today
+        while month <= _add_months(today, MONTHS_AHEAD):
+            upper = _add_months(month, 1)
+            op.execute(
+                f"CREATE TABLE {table}_p{month.year:04d}{month.month:02d} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{month}') TO ('{upper}')"
+            )
+            month = upper
+        op.execute(f'INSERT INTO {table} SELECT * FROM {old} WHERE {COLUMN} IS NOT NULL')
+        primary_key.append(COLUMN)
+    else:
+        op.execute(f'CREATE TABLE {table} {like}')
+        op.execute(f'INSERT INTO {table} SELECT * FROM {old}')
+
+    for name, sequence in sequences:
+        # Dropping the old table would otherwise drop the sequences it owns
+        op.execute(f'ALTER SEQUENCE {sequence} OWNED BY {table}.{name}')
+    op.execute(f'DROP TABLE {old}')
+    if primary_key:
+        op.execute(f"ALTER TABLE {table} ADD PRIMARY KEY ({', '.join(primary_key)})")
+    for name, definition in foreign_keys:
+        op.execute(f'ALTER TABLE {table} ADD CONSTRAINT {name} {definition}')
+    for definition, unique, columns in indexes:
+        # Captured before the rename, so they name the new table; indexes of a
+        # partitioned table are defined ON ONLY the parent
+        definition = definition.replace(' ON ONLY ', ' ON ', 1)
+        if partitioned and unique and COLUMN not in columns:
+            definition = definition.replace('CREATE UNIQUE INDEX', 'CREATE INDEX', 1)
+        op.execute(definition)
+
+
+def _existing_tables() -> list:
+    return [table for table in TABLES if sa.inspect(op.get_bind()).has_table(table)]
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for table in _existing_tables():
+        if not _is_partitioned(table):
+            _rebuild(table, partitioned=True)
+            op.execute(f"CREATE INDEX ix_{table}_lookup ON {table} ({', '.join(TABLES[table])})")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for table in _existing_tables():
+        if _is_partitioned(table):
+            _rebuild(table, partitioned=False)
+            op.execute(f'DROP INDEX IF EXISTS ix_{table}_lookup')
+            if table in NULLABLE_BEFORE:
+                op.execute(f'ALTER TABLE {table} ALTER COLUMN {COLUMN} DROP NOT NULL')
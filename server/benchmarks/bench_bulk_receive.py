@@ -0,0 +1,96 @@
+"""Compare receiving a shipment through the bulk path with one POST /batches per row.
+
+Seeds an on-disk SQLite database with medicines and existing batches, then
+receives ``rows`` batches (1% each with a taken QR code, an unknown medicine,
+a QR code longer than the column and a quantity beyond INTEGER) and checks
+that exactly the good rows were inserted.
+
+Usage (from the server directory):
+    python -m benchmarks.bench_bulk_receive [rows]
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import orjson
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from src.models import Base, Batch, Medicine
+from src.utils.bulk_batches import parse_rows, receive_batches
+
+MEDICINES = 500
+EXISTING = 1000
+
+def make_engine(path: str):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add_all(Medicine(medicine_id=i, name=f"Medicine {i}", category="general", unit="tablet")
+                        for i in range(1, MEDICINES + 1))
+        session.add_all(Batch(medicine_id=1, quantity=10, expiry_date=datetime(2026, 1, 1), qr_code=f"OLD{i:08d}")
+                        for i in range(EXISTING))
+        session.commit()
+    return engine
+
+def make_shipment(n: int) -> bytes:
+    expiry = datetime(2027, 1, 1)
+    rows = []
+    for i in range(n):
+        qr_code = f"OLD{i % EXISTING:08d}" if i % 100 == 1 else f"NEW{i:08d}"
+        if i % 100 == 3:
+            qr_code += "-OVERSIZED"
+        medicine_id = MEDICINES + 1 if i % 100 == 2 else i % MEDICINES + 1
+        quantity = 2 ** 31 if i % 100 == 4 else 100 + i % 50
+        rows.append({"medicine_id": medicine_id, "quantity": quantity,
+                     "expiry_date": (expiry + timedelta(days=i % 365)).isoformat(), "qr_code": qr_code})
+    return orjson.dumps(rows)
+
+def per_row(engine, body: bytes) -> int:
+    """What clients do today: one validated insert, commit and refresh per batch."""
+    from src import schemas
+
+    received = 0
+    with Session(engine) as session:
+        for row in orjson.loads(body):
+            batch = Batch(**schemas.BatchCreate.model_validate(row).model_dump())
+            session.add(batch)
+            try:
+                session.commit()
+                session.refresh(batch)
+                received += 1
+            except IntegrityError:
+                session.rollback()
+    return received
+
+def bulk(engine, body: bytes) -> int:
+    with Session(engine) as session:
+        return receive_batches(session, parse_rows(body, "application/json")).received
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    body = make_shipment(n)
+    expected = n - sum(len(range(bad, n, 100)) for bad in (1, 2, 3, 4))
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {}
+        for name, fn in (("per-row", per_row), ("bulk", bulk)):
+            engine = make_engine(os.path.join(tmp, f"{name}.db"))
+            start = time.perf_counter()
+            received = fn(engine, body)
+            results[name] = time.perf_counter() - start
+            with Session(engine) as session:
+                stored = session.scalar(select(func.count()).select_from(Batch)) - EXISTING
+            print(f"{name:<8} {results[name] * 1000:9.1f} ms  received {received}, stored {stored}")
+            if name == "bulk":
+                assert received == stored == expected, "bulk receive stored the wrong rows"
+            engine.dispose()
+    # The per-row path has no medicine or column-size checks: SQLite enforces neither by default
+    print(f"expected {expected} good rows; bulk speedup {results['per-row'] / results['bulk']:.0f}x")
+
+if __name__ == "__main__":
+    main()
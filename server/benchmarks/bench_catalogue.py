@@ -0,0 +1,92 @@
+"""Count the SQL statements behind the catalogue view at different catalogue sizes.
+
+Compares ``catalogue_query`` with walking the lazy ``Medicine.batches`` and
+``Medicine.predictions`` relationships. Exits non-zero if the catalogue query
+count grows with the number of medicines, so it can guard CI.
+
+Usage (from the server directory):
+    python -m benchmarks.bench_catalogue [medicines ...]
+"""
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from src.models import Base, Medicine, Batch, Prediction
+from src.routes.catalogue import catalogue_query
+
+NOW = datetime(2025, 1, 1)
+
+def seed(session: Session, n: int):
+    session.add_all(Medicine(medicine_id=i, name=f"Medicine {i:05d}", category="general", unit="tablet")
+                    for i in range(1, n + 1))
+    session.add_all(
+        Batch(medicine_id=i, quantity=100 + b, expiry_date=NOW + timedelta(days=30 * (b + 1) - i % 60),
+              qr_code=f"QR{i:06d}{b:02d}")
+        for i in range(1, n + 1) for b in range(5)
+    )
+    session.add_all(
+        Prediction(medicine_id=i, region="delhi", date=NOW + timedelta(days=d), predicted_demand=10.0,
+                   confidence_interval=2.0)
+        for i in range(1, n + 1) for d in range(45)
+    )
+    session.commit()
+
+def lazy_catalogue(session: Session) -> list:
+    """What a client view does today: touch each medicine's relationships."""
+    entries = []
+    for medicine in session.query(Medicine).order_by(Medicine.name):
+        usable = [b for b in medicine.batches if b.expiry_date >= NOW and b.quantity > 0]
+        upcoming = [p for p in medicine.predictions if NOW <= p.date < NOW + timedelta(days=30)]
+        entries.append((
+            medicine.medicine_id,
+            sum(b.quantity for b in usable),
+            min((b.expiry_date for b in usable), default=None),
+            sum(p.predicted_demand for p in upcoming) if upcoming else None,
+        ))
+    return entries
+
+def set_based_catalogue(session: Session) -> list:
+    rows = session.execute(catalogue_query(region="delhi", now=NOW)).all()
+    return [(row.medicine_id, row.total_stock, row.earliest_expiry, row.forecast_demand) for row in rows]
+
+def measure(engine, fn):
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        with Session(engine) as session:
+            start = time.perf_counter()
+            result = fn(session)
+            elapsed = time.perf_counter() - start
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    return result, len(statements), elapsed
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10, 100, 1000]
+    counts = set()
+    print(f"{'medicines':>10}  {'lazy queries':>12}  {'lazy ms':>9}  {'catalogue queries':>17}  {'catalogue ms':>12}")
+    for n in sizes:
+        engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+        Base.metadata.create_all(engine)
+        with Session(engine) as session:
+            seed(session, n)
+        lazy, lazy_queries, lazy_time = measure(engine, lazy_catalogue)
+        fast, fast_queries, fast_time = measure(engine, set_based_catalogue)
+        assert sorted(lazy) == sorted(fast), "catalogue query disagrees with the relationships"
+        counts.add(fast_queries)
+        print(f"{n:>10}  {lazy_queries:>12}  {lazy_time * 1000:>9.1f}  {fast_queries:>17}  {fast_time * 1000:>12.1f}")
+
+    if len(counts) > 1:
+        print("FAIL: catalogue query count depends on the number of medicines")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
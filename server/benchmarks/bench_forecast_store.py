@@ -0,0 +1,60 @@
+"""Compare the forecast CSVs with the columnar ForecastStore.
+
+Usage (from the server directory):
+    python -m benchmarks.bench_forecast_store [csv_dir] [store_dir]
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from src.utils.forecast_store import ForecastStore, convert_forecast_csvs
+
+CSV_DIR = Path("analysis/notebooks/forecasts")
+
+def dir_size(paths) -> int:
+    return sum(p.stat().st_size for p in paths)
+
+def best_of(fn, repeat: int = 5) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    csv_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else CSV_DIR
+    store_dir = Path(sys.argv[2]) if len(sys.argv) > 2 else Path(tempfile.mkdtemp())
+
+    convert_forecast_csvs(csv_dir, store_dir)
+    csv_files = sorted(csv_dir.glob("*_forecast.csv"))
+    keys = [p.stem[:-len("_forecast")].split("_", 1) for p in csv_files]
+
+    def read_csvs():
+        for path in csv_files:
+            pd.read_csv(path)
+
+    def read_store_full():
+        store = ForecastStore(store_dir)
+        for region, medicine in keys:
+            store.load(region, medicine)
+
+    def read_store_slice():
+        store = ForecastStore(store_dir)
+        for region, medicine in keys:
+            store.load(region, medicine, start="2024-01-01", end="2024-03-31")
+
+    csv_bytes = dir_size(csv_files)
+    store_bytes = dir_size(store_dir.iterdir())
+    print(f"series:             {len(csv_files)}")
+    print(f"CSV on disk:        {csv_bytes / 1e6:8.2f} MB")
+    print(f"store on disk:      {store_bytes / 1e6:8.2f} MB  ({csv_bytes / store_bytes:.1f}x smaller)")
+    print(f"CSV parse (all):    {best_of(read_csvs) * 1000:8.2f} ms")
+    print(f"store load (all):   {best_of(read_store_full) * 1000:8.2f} ms")
+    print(f"store load (Q1-24): {best_of(read_store_slice) * 1000:8.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Accuracy and training time of the global model versus the Prophet artifacts.
+
+In-sample metrics are compared with analysis/notebooks/metrics/*.json (which
+were computed on the training history); a 90-day holdout is reported too.
+Pass --prophet to also time fresh Prophet fits on the same series.
+
+Usage (from the server directory):
+    python -m benchmarks.bench_global_model [--prophet]
+"""
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.utils.global_model import GlobalModelTrainer
+
+DATA_DIR = Path("dataset/data")
+METRICS_DIR = Path("analysis/notebooks/metrics")
+HOLDOUT = 90
+
+def metrics(y_true, y_pred) -> dict:
+    y_true, y_pred = np.asarray(y_true, float), np.asarray(y_pred, float)
+    return {
+        "rmse": float(np.sqrt(np.mean((y_true - y_pred) ** 2))),
+        "mae": float(np.mean(np.abs(y_true - y_pred))),
+        "mape": float(np.mean(np.abs((y_true - y_pred) / y_true)) * 100),
+    }
+
+def fit_prophet(df: pd.DataFrame):
+    from prophet import Prophet
+    model = Prophet(
+        seasonality_mode="multiplicative",
+        yearly_seasonality=True,
+        weekly_seasonality=True,
+        daily_seasonality=False,
+        changepoint_prior_scale=0.05,
+        seasonality_prior_scale=10.0,
+    )
+    model.fit(df)
+    return model
+
+def main():
+    logging.getLogger("src.utils").setLevel(logging.WARNING)
+    trainer = GlobalModelTrainer(data_dir=DATA_DIR, model_dir=Path("/tmp/global_models"))
+    frames = {
+        region.name: trainer.load_region(region.name)
+        for region in sorted(DATA_DIR.iterdir()) if region.is_dir()
+    }
+    n_series = sum(len(f) for f in frames.values())
+
+    start = time.perf_counter()
+    params = trainer.tune_batch(frames, HOLDOUT)
+    tune_time = time.perf_counter() - start
+    start = time.perf_counter()
+    models = trainer.train_batch(frames, params)
+    fit_time = time.perf_counter() - start
+
+    train_frames = {r: {m: df.iloc[:-HOLDOUT] for m, df in f.items()} for r, f in frames.items()}
+    holdout_models = trainer.train_batch(train_frames, params)
+
+    print(f"series: {n_series}   ridge_alpha: {params['ridge_alpha']}")
+    print(f"global tuning: {tune_time:.3f}s   global fit (all series): {fit_time:.3f}s\n")
+    print(f"{'series':<24}{'prophet rmse':>13}{'global rmse':>12}{'prophet mape':>14}{'global mape':>12}{'holdout mape':>14}{'coverage':>10}")
+
+    prophet_time = 0.0
+    rows = []
+    for (region, medicine), model in models.items():
+        df = frames[region][medicine]
+        in_sample = metrics(df["y"], model.predict(df)["yhat"])
+
+        test = df.iloc[-HOLDOUT:]
+        forecast = holdout_models[(region, medicine)].predict(test)
+        held = metrics(test["y"], forecast["yhat"])
+        coverage = np.mean((test["y"].values >= forecast["yhat_lower"].values) &
+                           (test["y"].values <= forecast["yhat_upper"].values)) * 100
+
+        metrics_path = METRICS_DIR / f"{region}_{medicine}_metrics.json"
+        reference = json.loads(metrics_path.read_text()) if metrics_path.exists() else {}
+        if "--prophet" in sys.argv:
+            start = time.perf_counter()
+            fit_prophet(df)
+            prophet_time += time.perf_counter() - start
+
+        rows.append((reference, in_sample))
+        print(f"{region + '/' + medicine:<24}{reference.get('rmse', float('nan')):>13.2f}{in_sample['rmse']:>12.2f}"
+              f"{reference.get('mape', float('nan')):>14.2f}{in_sample['mape']:>12.2f}{held['mape']:>14.2f}{coverage:>9.1f}%")
+
+    with_ref = [(r, g) for r, g in rows if r]
+    print(f"\nmean in-sample MAPE   prophet {np.mean([r['mape'] for r, _ in with_ref]):.2f}"
+          f"   global {np.mean([g['mape'] for _, g in with_ref]):.2f}")
+    if prophet_time:
+        print(f"prophet fit (all series, fixed params): {prophet_time:.2f}s")
+
+if __name__ == "__main__":
+    main()
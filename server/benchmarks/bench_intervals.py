@@ -0,0 +1,109 @@
+"""Time each interval mode on the notebook models and measure out-of-sample coverage.
+
+Timing uses the saved models as they are, forecasting ``horizon`` days past
+their history. Coverage refits each model's specification on all but the
+last ``horizon`` days of its history and checks how often the held-out
+actuals fall inside each mode's interval (nominal: the model's
+interval_width, 80% for the notebook models).
+
+Usage (from the server directory):
+    python -m benchmarks.bench_intervals [horizon_days]
+"""
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from src.utils.intervals import INTERVAL_MODES, fit_residual_intervals, predict_with_intervals
+
+MODEL_DIR = Path("analysis/notebooks/models")
+REPEATS = 5
+
+logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+logging.getLogger("prophet").setLevel(logging.WARNING)
+
+def refit(model, history: pd.DataFrame):
+    """Fit a fresh Prophet with ``model``'s specification on ``history``."""
+    from prophet import Prophet
+
+    fresh = Prophet(
+        growth=model.growth,
+        n_changepoints=model.n_changepoints,
+        changepoint_range=model.changepoint_range,
+        changepoint_prior_scale=model.changepoint_prior_scale,
+        seasonality_prior_scale=model.seasonality_prior_scale,
+        holidays_prior_scale=model.holidays_prior_scale,
+        seasonality_mode=model.seasonality_mode,
+        interval_width=model.interval_width,
+        holidays=model.holidays,
+        yearly_seasonality=False,
+        weekly_seasonality=False,
+        daily_seasonality=False,
+    )
+    for name, spec in model.seasonalities.items():
+        fresh.add_seasonality(name=name, period=spec["period"], fourier_order=spec["fourier_order"],
+                              prior_scale=spec["prior_scale"], mode=spec["mode"],
+                              condition_name=spec.get("condition_name"))
+    for name, spec in model.extra_regressors.items():
+        fresh.add_regressor(name, prior_scale=spec["prior_scale"], standardize=spec["standardize"], mode=spec["mode"])
+    columns = ["ds", "y"] + list(model.extra_regressors)
+    return fresh.fit(history[columns])
+
+def time_modes(model, horizon: int) -> dict:
+    future = pd.DataFrame({"ds": pd.date_range(model.history["ds"].max() + pd.Timedelta(days=1), periods=horizon)})
+    start = time.perf_counter()
+    fit_residual_intervals(model)
+    timings = {"residual (training)": time.perf_counter() - start}
+    for mode in INTERVAL_MODES:
+        start = time.perf_counter()
+        for _ in range(REPEATS):
+            predict_with_intervals(model, future, mode)
+        timings[mode] = (time.perf_counter() - start) / REPEATS
+    return timings
+
+def coverage(model, horizon: int) -> dict:
+    history = model.history
+    train, test = history.iloc[:-horizon], history.iloc[-horizon:]
+    fresh = refit(model, train)
+    fit_residual_intervals(fresh)
+    results = {}
+    for mode in INTERVAL_MODES:
+        if mode == "none":
+            continue
+        forecast = predict_with_intervals(fresh, test[["ds"] + list(model.extra_regressors)], mode)
+        y = test["y"].values
+        inside = (y >= forecast["yhat_lower"].values) & (y <= forecast["yhat_upper"].values)
+        width = (forecast["yhat_upper"] - forecast["yhat_lower"]).values / np.maximum(forecast["yhat"].values, 1e-9)
+        results[mode] = (inside.mean(), width.mean())
+    return results
+
+def main():
+    horizon = int(sys.argv[1]) if len(sys.argv) > 1 else 90
+    paths = sorted(MODEL_DIR.glob("*_model.pkl"))
+    timings, coverages = [], []
+    for path in paths:
+        model = joblib.load(path)
+        name = path.name[:-len("_model.pkl")]
+        timings.append(time_modes(model, horizon))
+        coverages.append(coverage(model, horizon))
+        row = "  ".join(f"{mode} {cov:.0%}/{width:.2f}" for mode, (cov, width) in coverages[-1].items())
+        print(f"{name:<24} {row}")
+
+    print(f"\nmean predict time for {horizon} days over {len(paths)} models (ms)")
+    for key in timings[0]:
+        print(f"  {key:<20} {np.mean([t[key] for t in timings]) * 1000:8.1f}")
+    print(f"\nmean coverage / relative width on the last {horizon} days (nominal {model.interval_width:.0%})")
+    for mode in coverages[0]:
+        cov = np.mean([c[mode][0] for c in coverages])
+        width = np.mean([c[mode][1] for c in coverages])
+        print(f"  {mode:<20} {cov:8.1%}  {width:6.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Compare the default and fast serialization paths for large list responses.
+
+Usage (from the server directory):
+    python -m benchmarks.bench_list_serialization [rows]
+"""
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import List
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from src import schemas
+from src.utils.fast_json import iter_json_array
+
+BATCH_FIELDS = ["medicine_id", "quantity", "expiry_date", "qr_code", "id"]
+
+def make_rows(n: int) -> list:
+    start = datetime(2024, 1, 1)
+    return [
+        (i % 500 + 1, 1000 + i % 4000, start + timedelta(days=i % 730), f"QR{i:010d}", i + 1)
+        for i in range(n)
+    ]
+
+def default_path(rows: list) -> bytes:
+    """What FastAPI does for response_model=List[schemas.Batch]."""
+    objects = [SimpleNamespace(**dict(zip(BATCH_FIELDS, row))) for row in rows]
+    validated = TypeAdapter(List[schemas.Batch]).validate_python(objects)
+    return json.dumps(
+        jsonable_encoder(validated),
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+def fast_path(rows: list) -> bytes:
+    return b"".join(iter_json_array(rows, BATCH_FIELDS))
+
+def timed(fn, rows):
+    start = time.perf_counter()
+    body = fn(rows)
+    return time.perf_counter() - start, body
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rows = make_rows(n)
+
+    default_time, default_body = timed(default_path, rows)
+    fast_time, fast_body = timed(fast_path, rows)
+
+    assert json.loads(default_body) == json.loads(fast_body), "fast path output differs from schemas.Batch"
+
+    print(f"rows:          {n}")
+    print(f"default path:  {default_time * 1000:8.1f} ms  ({len(default_body) / 1e6:.1f} MB)")
+    print(f"fast path:     {fast_time * 1000:8.1f} ms  ({len(fast_body) / 1e6:.1f} MB)")
+    print(f"speedup:       {default_time / fast_time:8.1f}x")
+
+if __name__ == "__main__":
+    main()
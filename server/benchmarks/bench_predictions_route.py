@@ -0,0 +1,132 @@
+"""Time GET /api/predictions/{medicine_id} for a medicine without a trained model.
+
+Seeds a throwaway SQLite database with one medicine and a year of usage
+history, then requests its forecast twice through the ASGI app: the first
+call fits the fallback forecaster and stores 90 days of predictions, the
+second reads them back. A different ``interval_mode`` must recompute them,
+and quarter rollups must match the stored daily rows, both per medicine and
+through /rollups. The forecasting stage must then cover a medicine that was
+never requested, and the daily refresh must expire elapsed rollups. Exits non-zero if any of these checks fails.
+
+Usage (from the server directory):
+    python -m benchmarks.bench_predictions_route
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+workdir = tempfile.mkdtemp(prefix="bench_predictions_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'main.db')}"
+for name, value in {"SECRET_KEY": "bench", "ALGORITHM": "HS256", "ALLOWED_ORIGINS": "http://localhost"}.items():
+    os.environ.setdefault(name, value)
+os.environ.pop("DELHI_DATABASE_URL", None)
+sys.path.insert(0, os.getcwd())
+# The model registry lives under ./models; start from an empty one
+os.chdir(workdir)
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from src.database import engine
+from src.main import app
+from src.models import Base, Medicine, Prediction, PredictionRollup, UsageHistory
+from src.utils.fallback_forecast import fit_fallback_model
+from src.utils.forecasting import forecast_all
+from src.utils.model_registry import ModelRegistry
+from src.utils.rollups import period_of, refresh_rollups
+
+MEDICINE_ID = 7
+# Has a published model but is never requested through the route
+TRAINED_ID = 8
+REGION = "delhi"
+
+def seed():
+    Base.metadata.create_all(bind=engine)
+    start = date.today() - timedelta(days=365)
+    with Session(engine) as session:
+        session.add(Medicine(medicine_id=MEDICINE_ID, name="Paracetamol", category="analgesic", unit="tablet"))
+        session.add(Medicine(medicine_id=TRAINED_ID, name="Ibuprofen", category="analgesic", unit="tablet"))
+        session.add_all(
+            UsageHistory(medicine_id=medicine_id, date=start + timedelta(days=d),
+                         quantity_used=100 + 20 * ((d + 2) % 7 < 2) + (d * 37) % 11)
+            for medicine_id in (MEDICINE_ID, TRAINED_ID) for d in range(365)
+        )
+        session.commit()
+
+def request(client: TestClient, **params):
+    start = time.perf_counter()
+    response = client.get(f"/api/predictions/{MEDICINE_ID}", params={"region": REGION, **params})
+    elapsed = (time.perf_counter() - start) * 1000
+    assert response.status_code == 200, (response.status_code, response.text)
+    return response.json(), elapsed
+
+def main():
+    seed()
+    client = TestClient(app)
+
+    predictions, cold = request(client)
+    assert len(predictions) == 90, len(predictions)
+    assert {p["engine"] for p in predictions} == {"fallback"}, predictions[0]
+    print(f"fallback fit + store: {cold:.1f} ms")
+
+    again, warm = request(client)
+    # Served from the stored rows (the first one may have just slipped into the past)
+    assert again and {p["id"] for p in again} <= {p["id"] for p in predictions}
+    print(f"stored predictions:   {warm:.1f} ms")
+
+    # A different interval mode recomputes the stored forecast instead of serving it
+    pointwise, elapsed = request(client, interval_mode="none")
+    assert {p["interval_mode"] for p in pointwise} == {"none"}, pointwise[0]
+    assert all(p["confidence_interval"] == 0 for p in pointwise), pointwise[0]
+    print(f"interval mode change: {elapsed:.1f} ms")
+    predictions, _ = request(client)
+    assert {p["interval_mode"] for p in predictions} == {"full"} and predictions[0]["confidence_interval"] > 1
+
+    # Quarter rollups must match the stored daily rows they were built from
+    quarters, elapsed = request(client, granularity="quarter")
+    with Session(engine) as session:
+        # The latest forecast; earlier ones leave behind rows that are now in the past
+        daily = session.query(Prediction).order_by(Prediction.id.desc()).limit(90).all()
+    expected = {}
+    for pred in daily:
+        entry = expected.setdefault(period_of(pred.date, "quarter")[0], [0, 0.0, 0.0])
+        entry[0] += 1
+        entry[1] += pred.predicted_demand
+        entry[2] += pred.confidence_interval ** 2
+    assert [q["period"] for q in quarters] == sorted(expected), quarters
+    for q in quarters:
+        days, demand, width_sq = expected[q["period"]]
+        assert q["days"] == days and q["granularity"] == "quarter", q
+        assert abs(q["predicted_demand"] - demand) < 1e-6 * max(demand, 1), (q, demand)
+        assert abs(q["confidence_interval"] - width_sq ** 0.5) < 1e-6 * max(width_sq, 1), q
+    print(f"quarter rollups:      {elapsed:.1f} ms ({len(quarters)} quarters)")
+
+    region_rollups = client.get("/api/predictions/rollups", params={"region": REGION, "granularity": "quarter"})
+    assert region_rollups.status_code == 200 and region_rollups.json() == quarters, region_rollups.text
+
+    # The forecasting stage covers series nobody requested; the daily refresh
+    # drops elapsed days and expires forecasts that have run out
+    ModelRegistry(Path("models")).publish(fit_fallback_model("Ibuprofen", REGION), REGION, "Ibuprofen")
+    start = time.perf_counter()
+    assert forecast_all(regions=[REGION]) == 1
+    print(f"forecast stage:       {(time.perf_counter() - start) * 1000:.1f} ms")
+    rollups = client.get("/api/predictions/rollups", params={"region": REGION, "granularity": "month"}).json()
+    assert {r["medicine_id"] for r in rollups} == {MEDICINE_ID, TRAINED_ID}, rollups
+    assert all(r["created_at"] for r in rollups)
+    with Session(engine) as session:
+        def total_days(now):
+            refresh_rollups(session, now)
+            session.commit()
+            return sum(r.days for r in session.query(PredictionRollup).filter_by(granularity="month"))
+        ahead = total_days(None)
+        assert total_days(datetime.now() + timedelta(days=30)) < ahead
+        assert total_days(datetime.now() + timedelta(days=120)) == 0
+
+    missing = client.get("/api/predictions/999", params={"region": REGION})
+    assert missing.status_code == 404, missing.status_code
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Measure the import cost of ``src.main`` with ``python -X importtime``.
+
+Exits non-zero if a heavy ML dependency is imported at startup or if the
+cumulative import time exceeds STARTUP_BUDGET_MS, so it can guard CI.
+
+Usage (from the server directory):
+    python -m benchmarks.bench_startup [--top N]
+"""
+import os
+import re
+import subprocess
+import sys
+
+HEAVY_MODULES = ["prophet", "pandas", "numpy", "pyarrow", "joblib", "sklearn", "cmdstanpy"]
+STARTUP_BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", "1500"))
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+def import_times(module: str = "src.main") -> dict:
+    """Return ``{module: (self_us, cumulative_us)}`` for a fresh interpreter."""
+    env = {**os.environ, "DATABASE_URL": os.getenv("DATABASE_URL", "sqlite://")}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=env,
+    )
+    if proc.returncode != 0:
+        sys.stderr.write(proc.stderr[-2000:])
+        raise SystemExit(f"import {module} failed")
+    times = {}
+    for match in LINE.finditer(proc.stderr):
+        self_us, cumulative_us, _, name = match.groups()
+        times[name] = (int(self_us), int(cumulative_us))
+    return times
+
+def main():
+    top = int(sys.argv[sys.argv.index("--top") + 1]) if "--top" in sys.argv else 15
+    times = import_times()
+    total_ms = times["src.main"][1] / 1000
+
+    print(f"{'cumulative ms':>14}  module")
+    for name, (_, cumulative) in sorted(times.items(), key=lambda kv: -kv[1][1])[:top]:
+        print(f"{cumulative / 1000:>14.1f}  {name}")
+    print(f"\nsrc.main total: {total_ms:.1f} ms (budget {STARTUP_BUDGET_MS:.0f} ms)")
+
+    heavy = sorted({name.split(".")[0] for name in times} & set(HEAVY_MODULES))
+    failed = False
+    if heavy:
+        print(f"FAIL: heavy modules imported at startup: {', '.join(heavy)}")
+        failed = True
+    if total_ms > STARTUP_BUDGET_MS:
+        print("FAIL: startup import time over budget")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
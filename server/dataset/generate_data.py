@@ -6,6 +6,7 @@ from psycopg2.extras import execute_values
 import os
 from dotenv import load_dotenv
 import random
+import json
 from pathlib import Path
 
 # Load environment variables
@@ -150,6 +151,17 @@ def export_to_csv(data, filename, directory):
     df.to_csv(path / filename, index=False)
     print(f"Exported {filename} to {path}")
 
+def export_events(config, directory):
+    events = {
+        'pandemics': [(start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d'))
+                      for start, end, _ in config['pandemic_periods']],
+        'special_events': [date.strftime('%Y-%m-%d') for date, _ in config['special_events']]
+    }
+    path = Path(directory)
+    path.mkdir(parents=True, exist_ok=True)
+    (path / "events.json").write_text(json.dumps(events, indent=2))
+    print(f"Exported events.json to {path}")
+
 def clean_database(conn, cur):
     """Clean all existing data from the tables"""
     cur.execute("""
@@ -247,6 +259,14 @@ def main():
             medicines_data
         )
         
+        execute_values(cur,
+            "INSERT INTO pandemics (name, start_date, end_date, demand_multiplier) VALUES %s",
+            [(f"{region.title()} wave {i}", start, end, multiplier)
+             for i, (start, end, multiplier) in enumerate(config['pandemic_periods'], 1)]
+        )
+        # The global forecasting model reads these when trained from the CSVs
+        export_events(config, f"data/{region}")
+        
         # Generate and store data for each medicine
         for medicine_id, name, category, unit, base_demand in config['medicines']:
             print(f"Generating data for {name}...")
@@ -13,6 +13,22 @@ if not DATABASE_URL:
 engine = create_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Per-region databases (see dataset/init_db.sql); fall back to the main database
+REGION_DATABASE_URLS = {
+    "delhi": os.getenv("DELHI_DATABASE_URL"),
+    "kolkata": os.getenv("KOLKATA_DATABASE_URL"),
+}
+_region_engines = {}
+
+def get_region_engine(region: str):
+    """Return the engine holding inventory data for a region."""
+    url = REGION_DATABASE_URLS.get(region)
+    if not url:
+        return engine
+    if region not in _region_engines:
+        _region_engines[region] = create_engine(url)
+    return _region_engines[region]
+
 # Create declarative base
 Base = declarative_base()
 
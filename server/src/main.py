@@ -1,5 +1,6 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from sqlalchemy.orm import Session
 from . import models, schemas, auth
 from .database import engine, get_db
@@ -7,12 +8,16 @@ from datetime import timedelta
 from typing import List
 import os
 from dotenv import load_dotenv
-from .utils.scheduler import setup_model_retraining_schedule
+from .utils.scheduler import setup_model_retraining_schedule, get_scheduler_status
+from .utils.fast_json import stream_query
+from .utils.bulk_batches import BULK_RECEIVE_MAX_ROWS, parse_rows, receive_batches
+from .routes import catalogue, exports, predictions, simulations
+from .utils.metrics import MetricsMiddleware, instrument_pool, render_metrics
+from .utils.profiling import ProfilingMiddleware
 
 load_dotenv()
 
-# Create database tables
-models.Base.metadata.create_all(bind=engine)
+CREATE_TABLES_ON_STARTUP = os.getenv("CREATE_TABLES_ON_STARTUP", "true").lower() == "true"
 
 app = FastAPI(
     title="MediSmart API",
@@ -28,11 +33,35 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(ProfilingMiddleware)
+instrument_pool(engine)
+
+app.include_router(catalogue.router)
+app.include_router(exports.router)
+app.include_router(predictions.router)
+app.include_router(simulations.router)
 
 @app.on_event("startup")
 async def startup_event():
+    # Kept out of module import so workers start without touching the database;
+    # deployments that manage the schema with Alembic can switch it off
+    if CREATE_TABLES_ON_STARTUP:
+        models.Base.metadata.create_all(bind=engine)
     setup_model_retraining_schedule()
 
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    """Prometheus text exposition of this worker's metrics, or of every worker with METRICS_DIR"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+@app.get("/scheduler/status")
+async def scheduler_status(
+    current_user: models.User = Depends(auth.get_current_active_user)
+):
+    """Which worker owns the background schedule, as seen by this worker"""
+    return get_scheduler_status()
+
 # Auth endpoints
 @app.post("/token", response_model=schemas.Token)
 async def login_for_access_token(
@@ -57,9 +86,18 @@ async def login_for_access_token(
 # Medicine endpoints
 @app.get("/medicines", response_model=List[schemas.Medicine])
 async def get_medicines(
+    fast: bool = False,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_active_user)
 ):
+    if fast:
+        # Same shape as schemas.Medicine, without ORM objects or Pydantic validation
+        return stream_query({
+            "name": models.Medicine.name,
+            "category": models.Medicine.category,
+            "unit": models.Medicine.unit,
+            "id": models.Medicine.medicine_id,
+        })
     medicines = db.query(models.Medicine).all()
     return medicines
 
@@ -80,9 +118,19 @@ async def create_medicine(
 # Batch endpoints
 @app.get("/batches", response_model=List[schemas.Batch])
 async def get_batches(
+    fast: bool = False,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_active_user)
 ):
+    if fast:
+        # Same shape as schemas.Batch, without ORM objects or Pydantic validation
+        return stream_query({
+            "medicine_id": models.Batch.medicine_id,
+            "quantity": models.Batch.quantity,
+            "expiry_date": models.Batch.expiry_date,
+            "qr_code": models.Batch.qr_code,
+            "id": models.Batch.batch_id,
+        })
     batches = db.query(models.Batch).all()
     return batches
 
@@ -99,3 +147,20 @@ async def create_batch(
     db.commit()
     db.refresh(db_batch)
     return db_batch
+
+@app.post("/batches/bulk", response_model=schemas.BulkReceiveResponse, status_code=201)
+async def receive_batches_bulk(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_active_user)
+):
+    """Receive a shipment: a JSON array of batches or a CSV with the same columns"""
+    if current_user.role not in [models.UserRole.ADMIN, models.UserRole.MANAGER]:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    try:
+        rows = parse_rows(await request.body(), request.headers.get("content-type", ""))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid upload: {str(e)}")
+    if len(rows) > BULK_RECEIVE_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_RECEIVE_MAX_ROWS} batches per upload")
+    return receive_batches(db, rows)
@@ -4,9 +4,11 @@ from sqlalchemy import (
     String, 
     Float, 
     DateTime, 
+    Date,
     ForeignKey, 
     Enum as SQLEnum,
-    Boolean
+    Boolean,
+    Index
 )
 from sqlalchemy.orm import relationship
 from .database import Base
@@ -49,6 +51,24 @@ class Batch(Base):
     qr_code = Column(String(20), unique=True, nullable=False)
     medicine = relationship("Medicine", back_populates="batches")
 
+class UsageHistory(Base):
+    __tablename__ = "usage_history"
+    
+    usage_id = Column(Integer, primary_key=True)
+    medicine_id = Column(Integer, ForeignKey("medicines.medicine_id"))
+    batch_id = Column(Integer, ForeignKey("batches.batch_id"))
+    date = Column(Date, nullable=False)
+    quantity_used = Column(Integer, nullable=False)
+
+class Pandemic(Base):
+    __tablename__ = "pandemics"
+    
+    pandemic_id = Column(Integer, primary_key=True)
+    name = Column(String(100), nullable=False)
+    start_date = Column(Date, nullable=False)
+    end_date = Column(Date, nullable=False)
+    demand_multiplier = Column(Float, nullable=False)
+
 class Prediction(Base):
     __tablename__ = "predictions"
     
@@ -58,5 +78,25 @@ class Prediction(Base):
     date = Column(DateTime)
     predicted_demand = Column(Float)
     confidence_interval = Column(Float)
+    engine = Column(String(20), default="prophet")
+    interval_mode = Column(String(10))
     created_at = Column(DateTime, default=datetime.utcnow)
     medicine = relationship("Medicine", back_populates="predictions")
+
+class PredictionRollup(Base):
+    __tablename__ = "prediction_rollups"
+    __table_args__ = (
+        Index("ix_prediction_rollups_lookup", "granularity", "region", "period_start"),
+        Index("ix_prediction_rollups_medicine", "medicine_id", "region", "granularity"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    medicine_id = Column(Integer, ForeignKey("medicines.medicine_id"))
+    region = Column(String)
+    granularity = Column(String(10), nullable=False)
+    period = Column(String(10), nullable=False)
+    period_start = Column(DateTime, nullable=False)
+    days = Column(Integer, nullable=False)
+    predicted_demand = Column(Float)
+    confidence_interval = Column(Float)
+    created_at = Column(DateTime, default=datetime.utcnow)
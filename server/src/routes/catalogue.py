@@ -0,0 +1,89 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy import and_, func, select
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from datetime import datetime, timedelta
+import math
+
+from .. import auth
+from ..database import get_db
+from ..models import Medicine, Batch, Prediction
+from ..schemas import CatalogueEntry
+
+router = APIRouter(prefix="/api/catalogue", tags=["catalogue"])
+
+def catalogue_query(region: Optional[str] = None, category: Optional[str] = None, days: int = 30,
+                    now: Optional[datetime] = None):
+    """One statement: medicines joined to per-medicine batch and forecast aggregates."""
+    # Local time, the clock forecasts are stored with (see utils/forecasting.py)
+    now = now or datetime.now()
+    stock = (
+        select(
+            Batch.medicine_id,
+            func.sum(Batch.quantity).label("total_stock"),
+            func.count(Batch.batch_id).label("batch_count"),
+            func.min(Batch.expiry_date).label("earliest_expiry"),
+        )
+        .where(Batch.expiry_date >= now, Batch.quantity > 0)
+        .group_by(Batch.medicine_id)
+        .subquery()
+    )
+    forecast_filter = [Prediction.date >= now, Prediction.date < now + timedelta(days=days)]
+    if region:
+        forecast_filter.append(Prediction.region == region)
+    forecast = (
+        select(
+            Prediction.medicine_id,
+            func.sum(Prediction.predicted_demand).label("forecast_demand"),
+            # Daily interval widths combine as the root of the sum of squares
+            func.sum(Prediction.confidence_interval * Prediction.confidence_interval).label("interval_squares"),
+        )
+        .where(and_(*forecast_filter))
+        .group_by(Prediction.medicine_id)
+        .subquery()
+    )
+    stmt = (
+        select(
+            Medicine.medicine_id,
+            Medicine.name,
+            Medicine.category,
+            Medicine.unit,
+            func.coalesce(stock.c.total_stock, 0).label("total_stock"),
+            func.coalesce(stock.c.batch_count, 0).label("batch_count"),
+            stock.c.earliest_expiry,
+            forecast.c.forecast_demand,
+            forecast.c.interval_squares,
+        )
+        .outerjoin(stock, stock.c.medicine_id == Medicine.medicine_id)
+        .outerjoin(forecast, forecast.c.medicine_id == Medicine.medicine_id)
+        .order_by(Medicine.name)
+    )
+    if category:
+        stmt = stmt.where(Medicine.category == category)
+    return stmt
+
+@router.get("", response_model=List[CatalogueEntry])
+def get_catalogue(
+    region: Optional[str] = None,
+    category: Optional[str] = None,
+    days: int = 30,
+    db: Session = Depends(get_db),
+    current_user=Depends(auth.get_current_active_user)
+):
+    """Every medicine with its usable stock, earliest expiry and forecast demand for the next ``days`` days"""
+    rows = db.execute(catalogue_query(region, category, days)).all()
+    return [
+        CatalogueEntry(
+            id=row.medicine_id,
+            name=row.name,
+            category=row.category,
+            unit=row.unit,
+            total_stock=row.total_stock,
+            batch_count=row.batch_count,
+            earliest_expiry=row.earliest_expiry,
+            forecast_days=days,
+            forecast_demand=row.forecast_demand,
+            forecast_interval=math.sqrt(row.interval_squares) if row.interval_squares is not None else None,
+        )
+        for row in rows
+    ]
@@ -0,0 +1,232 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy import DateTime, select
+from datetime import date, datetime, timedelta
+from typing import Optional
+import io
+import os
+import threading
+import logging
+
+from .. import auth
+from ..database import REGION_DATABASE_URLS, engine, get_region_engine
+from ..models import Prediction, Batch, UsageHistory, UserRole
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/exports", tags=["exports"])
+
+EXPORT_BLOCK_SIZE = int(os.getenv("EXPORT_BLOCK_SIZE", str(4 << 20)))
+
+MEDIA_TYPES = {
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# Predictions carry a region column in the main database; batches and usage
+# history live in the per-region databases. Column types are pyarrow aliases,
+# resolved on first export so pyarrow is not imported at startup.
+EXPORTS = {
+    "predictions": {
+        "table": Prediction.__table__,
+        "date_column": "date",
+        "region_column": "region",
+        "columns": [
+            ("id", "int64"),
+            ("medicine_id", "int32"),
+            ("region", "string"),
+            ("date", "timestamp[us]"),
+            ("predicted_demand", "double"),
+            ("confidence_interval", "double"),
+            ("created_at", "timestamp[us]"),
+        ],
+    },
+    "batches": {
+        "table": Batch.__table__,
+        "date_column": "expiry_date",
+        "region_column": None,
+        "columns": [
+            ("batch_id", "int64"),
+            ("medicine_id", "int32"),
+            ("quantity", "int32"),
+            ("expiry_date", "timestamp[us]"),
+            ("qr_code", "string"),
+        ],
+    },
+    "usage_history": {
+        "table": UsageHistory.__table__,
+        "date_column": "date",
+        "region_column": None,
+        "columns": [
+            ("usage_id", "int64"),
+            ("medicine_id", "int32"),
+            ("batch_id", "int32"),
+            ("date", "date32"),
+            ("quantity_used", "int32"),
+        ],
+    },
+}
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands back whatever was written since the last drain."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+def _day_bound(column, day: date):
+    # Timestamp columns are compared with datetimes: SQLite compares them as text
+    return datetime.combine(day, datetime.min.time()) if isinstance(column.type, DateTime) else day
+
+def build_export_query(dataset: str, region: Optional[str], start: Optional[date], end: Optional[date]):
+    """Rows whose date falls on ``start`` .. ``end`` inclusive, whatever their time of day."""
+    spec = EXPORTS[dataset]
+    table = spec["table"]
+    date_column = table.c[spec["date_column"]]
+    stmt = select(*[table.c[name] for name, _ in spec["columns"]])
+    if region and spec["region_column"]:
+        stmt = stmt.where(table.c[spec["region_column"]] == region)
+    if start:
+        stmt = stmt.where(date_column >= _day_bound(date_column, start))
+    if end:
+        stmt = stmt.where(date_column < _day_bound(date_column, end + timedelta(days=1)))
+    return stmt.order_by(date_column)
+
+def _copy_to_pipe(db_engine, stmt, write_fd: int, errors: list):
+    """Run ``COPY (stmt) TO STDOUT`` into a pipe so rows never become Python objects."""
+    sink = os.fdopen(write_fd, "wb", buffering=1 << 20)
+    try:
+        raw = db_engine.raw_connection()
+        try:
+            cursor = raw.cursor()
+            compiled = stmt.compile(dialect=db_engine.dialect)
+            sql = cursor.mogrify(str(compiled), compiled.params).decode()
+            cursor.copy_expert(f"COPY ({sql}) TO STDOUT WITH (FORMAT csv, HEADER)", sink)
+        finally:
+            raw.close()
+    except Exception as e:
+        errors.append(e)
+    finally:
+        try:
+            sink.close()
+        except OSError:
+            pass
+
+def export_schema(dataset: str):
+    import pyarrow as pa
+    return pa.schema([(name, pa.type_for_alias(alias)) for name, alias in EXPORTS[dataset]["columns"]])
+
+def iter_record_batches(csv_stream, schema):
+    """Parse a CSV byte stream into record batches of ``schema``."""
+    import pyarrow.csv as pacsv
+    reader = pacsv.open_csv(
+        csv_stream,
+        read_options=pacsv.ReadOptions(block_size=EXPORT_BLOCK_SIZE),
+        convert_options=pacsv.ConvertOptions(
+            column_types=schema,
+            include_columns=schema.names,
+            strings_can_be_null=True,
+        ),
+    )
+    for batch in reader:
+        yield batch
+
+def iter_encoded(batches, schema, fmt: str):
+    """Encode record batches as an Arrow IPC stream or Parquet file, chunk by chunk."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    sink = _ChunkSink()
+    if fmt == "arrow":
+        writer = pa.ipc.new_stream(sink, schema)
+    else:
+        writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    for batch in batches:
+        writer.write_batch(batch)
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+def iter_fetched_batches(db_engine, stmt, schema, rows_per_batch: int = 65536):
+    """Record batches from a server-side cursor, for drivers without COPY."""
+    import pyarrow as pa
+    with db_engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=rows_per_batch).execute(stmt)
+        for rows in result.partitions():
+            columns = zip(*rows)
+            yield pa.record_batch(
+                [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+                schema=schema
+            )
+
+def supports_copy(db_engine) -> bool:
+    return db_engine.dialect.name == "postgresql" and db_engine.dialect.driver == "psycopg2"
+
+def stream_export(db_engine, stmt, schema, fmt: str):
+    if not supports_copy(db_engine):
+        yield from iter_encoded(iter_fetched_batches(db_engine, stmt, schema), schema, fmt)
+        return
+    read_fd, write_fd = os.pipe()
+    errors = []
+    worker = threading.Thread(
+        target=_copy_to_pipe,
+        args=(db_engine, stmt, write_fd, errors),
+        daemon=True,
+    )
+    worker.start()
+    with os.fdopen(read_fd, "rb") as csv_stream:
+        try:
+            yield from iter_encoded(iter_record_batches(csv_stream, schema), schema, fmt)
+        finally:
+            # Closing the read end unblocks COPY if the client went away early
+            csv_stream.close()
+            worker.join()
+    if errors:
+        logger.error(f"Export failed: {errors[0]}")
+        raise errors[0]
+
+@router.get("/{dataset}")
+def export_dataset(
+    dataset: str,
+    region: str,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    format: str = "arrow",
+    current_user=Depends(auth.get_current_active_user)
+):
+    """Export predictions, batches or usage history for a region as Arrow IPC or Parquet"""
+    if current_user.role not in [UserRole.ADMIN, UserRole.MANAGER]:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    if dataset not in EXPORTS:
+        raise HTTPException(status_code=404, detail=f"Unknown dataset: {dataset}")
+    if format not in MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="format must be 'arrow' or 'parquet'")
+    # get_region_engine falls back to the main database for unknown regions
+    if region not in REGION_DATABASE_URLS:
+        raise HTTPException(status_code=400, detail=f"Unknown region: {region}")
+
+    spec = EXPORTS[dataset]
+    db_engine = engine if spec["region_column"] else get_region_engine(region)
+    stmt = build_export_query(dataset, region, start, end)
+    extension = "arrows" if format == "arrow" else "parquet"
+
+    return StreamingResponse(
+        stream_export(db_engine, stmt, export_schema(dataset), format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{region}_{dataset}.{extension}"'},
+    )
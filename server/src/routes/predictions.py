@@ -1,29 +1,79 @@
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
 from sqlalchemy.orm import Session
-from typing import List
-import pandas as pd
+from typing import List, Optional, Union
 from datetime import datetime, timedelta
-import joblib
 from pathlib import Path
 
+from .. import auth
 from ..database import get_db
-from ..models import Medicine, Prediction
-from ..schemas import PredictionResponse, PredictionCreate
-from ..utils.prophet_helper import load_prophet_model, generate_prediction
+from ..models import Medicine, Prediction, PredictionRollup, UserRole
+from ..schemas import PredictionResponse, PredictionCreate, PredictionRollupResponse
+from ..utils.forecasting import forecast_series
+from ..utils.rollups import GRANULARITIES, materialize_rollups, period_of
+from ..utils.metrics import model_operation_duration
+from ..utils.model_registry import ModelRegistry
+from ..utils.intervals import INTERVAL_MODE, INTERVAL_MODES
 
 router = APIRouter(prefix="/api/predictions", tags=["predictions"])
 
 MODEL_DIR = Path("models")
 FORECAST_DIR = Path("forecasts")
 
-@router.get("/{medicine_id}", response_model=List[PredictionResponse])
+# Shared by all requests in this worker so unchanged models stay loaded
+registry = ModelRegistry(MODEL_DIR)
+
+def check_granularity(granularity: str):
+    if granularity not in GRANULARITIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"granularity must be one of {', '.join(GRANULARITIES)}"
+        )
+
+def model_changed_since(prediction: Prediction, region: str, medicine: str) -> bool:
+    """Whether the served model changed after ``prediction`` was stored"""
+    current = registry.current(region, medicine)
+    if current is not None:
+        return datetime.fromisoformat(current["promoted_at"]) > prediction.created_at
+    return prediction.engine == "fallback" and registry.exists(region, medicine)
+
+@router.get("/rollups", response_model=List[PredictionRollupResponse])
+async def get_prediction_rollups(
+    region: str,
+    granularity: str = "quarter",
+    start: Optional[datetime] = None,
+    db: Session = Depends(get_db)
+):
+    """Get precomputed period totals for every medicine in a region, from the current period on"""
+    check_granularity(granularity)
+    if granularity == "day":
+        raise HTTPException(status_code=400, detail="Use /api/predictions/{medicine_id} for daily predictions")
+    start = start or period_of(datetime.now(), granularity)[1]
+    query = db.query(PredictionRollup).filter(
+        PredictionRollup.granularity == granularity,
+        PredictionRollup.region == region,
+        PredictionRollup.period_start >= start
+    )
+    return query.order_by(PredictionRollup.period_start, PredictionRollup.medicine_id).all()
+
+@router.get(
+    "/{medicine_id}",
+    response_model=Union[List[PredictionRollupResponse], List[PredictionResponse]]
+)
 async def get_medicine_predictions(
     medicine_id: int,
     region: str,
+    granularity: str = "day",
+    interval_mode: str = INTERVAL_MODE,
     db: Session = Depends(get_db)
 ):
     """Get predictions for a specific medicine in a region"""
-    medicine = db.query(Medicine).filter(Medicine.id == medicine_id).first()
+    check_granularity(granularity)
+    if interval_mode not in INTERVAL_MODES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"interval_mode must be one of {', '.join(INTERVAL_MODES)}"
+        )
+    medicine = db.query(Medicine).filter(Medicine.medicine_id == medicine_id).first()
     if not medicine:
         raise HTTPException(status_code=404, detail="Medicine not found")
     
@@ -34,42 +84,77 @@ async def get_medicine_predictions(
         Prediction.date >= datetime.now()
     ).all()
     
+    # Rows stored before the mode was recorded were computed with full intervals
+    if predictions and (
+        model_changed_since(predictions[0], region, medicine.name)
+        or (predictions[0].interval_mode or "full") != interval_mode
+    ):
+        # A new model (or a rollback) has been published since these were
+        # stored, or they were computed with a different interval mode
+        predictions = []
+    
     if not predictions:
-        # Generate new predictions if none exist
-        model_path = MODEL_DIR / f"{region}_{medicine.name.lower()}_model.pkl"
-        if not model_path.exists():
-            raise HTTPException(
-                status_code=404,
-                detail=f"No prediction model found for {medicine.name} in {region}"
-            )
+        from ..utils.fallback_forecast import fit_fallback_model
         
-        model = joblib.load(model_path)
-        future_dates = pd.date_range(
-            start=datetime.now(),
-            periods=90,
-            freq='D'
-        )
-        
-        forecast = model.predict(pd.DataFrame({'ds': future_dates}))
-        
-        # Store predictions in database
-        new_predictions = []
-        for _, row in forecast.iterrows():
-            pred = Prediction(
-                medicine_id=medicine_id,
-                region=region,
-                date=row['ds'],
-                predicted_demand=row['yhat'],
-                confidence_interval=row['yhat_upper'] - row['yhat_lower']
-            )
-            db.add(pred)
-            new_predictions.append(pred)
+        # Generate new predictions if none exist
+        try:
+            with model_operation_duration.time(operation="load", engine="registry"):
+                model, _ = registry.load(region, medicine.name)
+        except FileNotFoundError:
+            # No trained model yet (e.g. a new medicine): fit a quick fallback
+            try:
+                with model_operation_duration.time(operation="fit", engine="fallback"):
+                    model = fit_fallback_model(medicine.name, region)
+            except ValueError:
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"No prediction model or usage history found for {medicine.name} in {region}"
+                )
         
+        # Replaces the stored future predictions and rollups of this series
+        predictions = forecast_series(db, medicine, region, model, interval_mode)
         db.commit()
-        predictions = new_predictions
+    
+    if granularity != "day":
+        rollup_query = db.query(PredictionRollup).filter(
+            PredictionRollup.medicine_id == medicine_id,
+            PredictionRollup.region == region,
+            PredictionRollup.granularity == granularity,
+            PredictionRollup.period_start >= period_of(datetime.now(), granularity)[1]
+        ).order_by(PredictionRollup.period_start)
+        rollups = rollup_query.all()
+        if not rollups:
+            # Predictions stored before rollups were materialized
+            materialize_rollups(db, medicine_id, region, predictions)
+            db.commit()
+            rollups = rollup_query.all()
+        return rollups
     
     return predictions
 
+@router.get("/models/{region}/{medicine}")
+async def get_model_versions(region: str, medicine: str):
+    """List the retained model versions of a medicine in a region"""
+    versions = registry.versions(region, medicine)
+    if not versions:
+        raise HTTPException(status_code=404, detail=f"No model versions found for {medicine} in {region}")
+    return {"current": registry.current(region, medicine), "versions": versions}
+
+@router.post("/models/{region}/{medicine}/rollback")
+async def rollback_model(
+    region: str,
+    medicine: str,
+    version: Optional[str] = None,
+    current_user=Depends(auth.get_current_active_user)
+):
+    """Serve an earlier model version (by default the previous one)"""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    try:
+        return registry.rollback(region, medicine, version)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+
 @router.post("/retrain", status_code=201)
 async def trigger_model_retraining(
     background_tasks: BackgroundTasks,
@@ -81,17 +166,13 @@ async def trigger_model_retraining(
 
 async def retrain_models(db: Session):
     """Background task to retrain all prediction models"""
-    from ..utils.model_training import train_models
+    from ..utils.forecasting import forecast_all
+    from ..utils.model_training import train_all_models
     
     try:
-        # Get all unique medicine-region combinations
-        medicines = db.query(Medicine).all()
-        regions = ['delhi', 'kolkata']  # Add more regions as needed
-        
-        for medicine in medicines:
-            for region in regions:
-                # Train model for each medicine-region combination
-                train_models(medicine.id, region)
+        # Every medicine-region combination, one usage_history read per region
+        train_all_models()
+        forecast_all()
                 
         # Update last_trained timestamp in database
         db.execute(
@@ -0,0 +1,46 @@
+from fastapi import APIRouter, Depends, HTTPException
+import os
+
+from .. import auth
+from ..database import REGION_DATABASE_URLS
+from ..schemas import StockoutSimulationRequest, StockoutSimulationResponse
+
+router = APIRouter(prefix="/api/simulations", tags=["simulations"])
+
+SIMULATION_MAX_HORIZON = int(os.getenv("SIMULATION_MAX_HORIZON", "365"))
+SIMULATION_MAX_TRAJECTORIES = int(os.getenv("SIMULATION_MAX_TRAJECTORIES", "20000"))
+
+@router.post("/stockout", response_model=StockoutSimulationResponse)
+def simulate_stockout(
+    scenario: StockoutSimulationRequest,
+    current_user=Depends(auth.get_current_active_user)
+):
+    """Monte Carlo stock-out probabilities from current batches and stored forecasts, with optional surges"""
+    # numpy is only imported once a simulation is requested
+    from ..utils.simulation import run_scenario
+
+    regions = scenario.regions or list(REGION_DATABASE_URLS)
+    unknown = sorted(set(regions) - set(REGION_DATABASE_URLS))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown region: {', '.join(unknown)}")
+    if not 1 <= scenario.horizon_days <= SIMULATION_MAX_HORIZON:
+        raise HTTPException(status_code=400, detail=f"horizon_days must be between 1 and {SIMULATION_MAX_HORIZON}")
+    if not 1 <= scenario.trajectories <= SIMULATION_MAX_TRAJECTORIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"trajectories must be between 1 and {SIMULATION_MAX_TRAJECTORIES}"
+        )
+
+    results = run_scenario(
+        regions,
+        [surge.model_dump() for surge in scenario.surges],
+        horizon=scenario.horizon_days,
+        trajectories=scenario.trajectories,
+        medicine_ids=scenario.medicine_ids,
+        seed=scenario.seed
+    )
+    return StockoutSimulationResponse(
+        horizon_days=scenario.horizon_days,
+        trajectories=scenario.trajectories,
+        results=results
+    )
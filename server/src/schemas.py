@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
 from typing import Optional, List
 from .models import UserRole
@@ -36,6 +36,14 @@ class Medicine(MedicineBase):
     class Config:
         from_attributes = True
 
+class CatalogueEntry(Medicine):
+    total_stock: int
+    batch_count: int
+    earliest_expiry: Optional[datetime] = None
+    forecast_days: int
+    forecast_demand: Optional[float] = None
+    forecast_interval: Optional[float] = None
+
 class BatchBase(BaseModel):
     medicine_id: int
     quantity: int
@@ -45,12 +53,31 @@ class BatchBase(BaseModel):
 class BatchCreate(BatchBase):
     pass
 
+# Largest value of the INTEGER columns behind medicine_id and quantity
+INT4_MAX = 2 ** 31 - 1
+
+class BulkBatchRow(BatchCreate):
+    """One uploaded row, checked against the batches columns before any insert"""
+    medicine_id: int = Field(ge=1, le=INT4_MAX)
+    quantity: int = Field(gt=0, le=INT4_MAX)
+    qr_code: str = Field(min_length=1, max_length=20)
+
 class Batch(BatchBase):
     id: int
 
     class Config:
         from_attributes = True
 
+class BulkRowError(BaseModel):
+    row: int
+    qr_code: Optional[str] = None
+    error: str
+
+class BulkReceiveResponse(BaseModel):
+    received: int
+    rejected: int
+    errors: List[BulkRowError]
+
 class PredictionBase(BaseModel):
     medicine_id: int
     region: str
@@ -63,7 +90,56 @@ class PredictionCreate(PredictionBase):
 
 class PredictionResponse(PredictionBase):
     id: int
+    engine: Optional[str] = None
+    interval_mode: Optional[str] = None
     created_at: datetime
 
     class Config:
         from_attributes = True
+
+class PredictionRollupResponse(BaseModel):
+    medicine_id: int
+    region: str
+    granularity: str
+    period: str
+    period_start: datetime
+    days: int
+    predicted_demand: float
+    confidence_interval: float
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class SurgeScenario(BaseModel):
+    multiplier: float
+    days: int
+    start_day: int = 0
+    ramp_days: Optional[int] = None
+    regions: Optional[List[str]] = None
+
+class StockoutSimulationRequest(BaseModel):
+    regions: Optional[List[str]] = None
+    medicine_ids: Optional[List[int]] = None
+    horizon_days: int = 90
+    trajectories: int = 2000
+    surges: List[SurgeScenario] = []
+    seed: Optional[int] = None
+
+class StockoutResult(BaseModel):
+    medicine_id: int
+    region: str
+    current_stock: float
+    demand_source: str
+    stockout_probability: float
+    days_to_stockout_p10: Optional[int] = None
+    days_to_stockout_p50: Optional[int] = None
+    expected_demand: float
+    expected_shortage: float
+    expected_expired: float
+    fill_rate: float
+
+class StockoutSimulationResponse(BaseModel):
+    horizon_days: int
+    trajectories: int
+    results: List[StockoutResult]
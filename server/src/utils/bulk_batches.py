@@ -0,0 +1,98 @@
+import csv
+import io
+import os
+from typing import Iterable, List
+
+import orjson
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from .. import schemas
+from ..models import Batch, Medicine
+
+BULK_RECEIVE_MAX_ROWS = int(os.getenv("BULK_RECEIVE_MAX_ROWS", "50000"))
+# Bound parameters per IN (...) lookup; well under SQLite's and Postgres' limits
+LOOKUP_CHUNK_SIZE = 5000
+
+def parse_rows(body: bytes, content_type: str) -> List[dict]:
+    """Rows of a JSON array or a CSV file with a header line."""
+    if content_type.startswith("text/csv"):
+        return list(csv.DictReader(io.StringIO(body.decode("utf-8-sig"))))
+    rows = orjson.loads(body)
+    if not isinstance(rows, list):
+        raise ValueError("Expected a JSON array of batches")
+    return rows
+
+def _existing(db: Session, column, values: list) -> set:
+    found = set()
+    for i in range(0, len(values), LOOKUP_CHUNK_SIZE):
+        chunk = values[i:i + LOOKUP_CHUNK_SIZE]
+        found.update(db.scalars(select(column).where(column.in_(chunk))))
+    return found
+
+def _insert_statement(db: Session):
+    """Multi-row insert that skips QR codes inserted concurrently, where the dialect allows it."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return insert(Batch), False
+    stmt = dialect_insert(Batch).on_conflict_do_nothing(index_elements=["qr_code"]).returning(Batch.qr_code)
+    return stmt, True
+
+def receive_batches(db: Session, rows: Iterable[dict]) -> schemas.BulkReceiveResponse:
+    """Validate and insert batches in one transaction, reporting bad rows instead of failing.
+
+    QR uniqueness (within the upload and against stored batches) and medicine
+    existence are each checked with a single set-based query per chunk.
+    """
+    errors = []
+    valid = []
+    seen_qr = set()
+    for index, row in enumerate(rows):
+        try:
+            batch = schemas.BulkBatchRow.model_validate(row)
+        except ValidationError as e:
+            message = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+            qr_code = row.get("qr_code") if isinstance(row, dict) else None
+            errors.append(schemas.BulkRowError(row=index, qr_code=qr_code, error=message))
+            continue
+        if batch.qr_code in seen_qr:
+            errors.append(schemas.BulkRowError(row=index, qr_code=batch.qr_code, error="Duplicate qr_code in upload"))
+            continue
+        seen_qr.add(batch.qr_code)
+        valid.append((index, batch))
+
+    taken = _existing(db, Batch.qr_code, list(seen_qr))
+    known_medicines = _existing(db, Medicine.medicine_id, list({batch.medicine_id for _, batch in valid}))
+
+    accepted = []
+    for index, batch in valid:
+        if batch.qr_code in taken:
+            errors.append(schemas.BulkRowError(row=index, qr_code=batch.qr_code, error="qr_code already exists"))
+        elif batch.medicine_id not in known_medicines:
+            errors.append(schemas.BulkRowError(
+                row=index, qr_code=batch.qr_code, error=f"Medicine {batch.medicine_id} not found"
+            ))
+        else:
+            accepted.append((index, batch))
+
+    received = 0
+    if accepted:
+        stmt, returns_rows = _insert_statement(db)
+        result = db.execute(stmt, [batch.model_dump() for _, batch in accepted])
+        if returns_rows:
+            inserted = set(result.scalars())
+            for index, batch in accepted:
+                if batch.qr_code not in inserted:
+                    errors.append(schemas.BulkRowError(row=index, qr_code=batch.qr_code, error="qr_code already exists"))
+            received = len(inserted)
+        else:
+            received = len(accepted)
+        db.commit()
+
+    errors.sort(key=lambda error: error.row)
+    return schemas.BulkReceiveResponse(received=received, rejected=len(errors), errors=errors)
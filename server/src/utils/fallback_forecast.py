@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+from statistics import NormalDist
+from sqlalchemy import func, select
+
+from ..database import get_region_engine
+from ..models import Medicine, UsageHistory
+
+HISTORY_DAYS = 365
+SEASON = 7
+
+class FallbackModel:
+    """Weekly-seasonal exponential smoothing fitted straight from usage history.
+
+    Used when no trained model exists for a medicine/region. Fitting is a
+    single pass over at most a year of daily totals, so it runs in
+    milliseconds on the request path. ``predict`` returns the same
+    ds/yhat/yhat_lower/yhat_upper frame as a Prophet model.
+    """
+
+    engine = "fallback"
+
+    def __init__(self, alpha: float = 0.2, gamma: float = 0.1, interval_width: float = 0.8):
+        self.alpha = alpha
+        self.gamma = gamma
+        self.interval_width = interval_width
+
+    def fit(self, dates, quantities) -> "FallbackModel":
+        days = np.asarray(dates, dtype="datetime64[D]")
+        y = np.asarray(quantities, dtype=float)
+        if len(y) == 0:
+            raise ValueError("No usage history to fit")
+
+        # Fill missing days with zero usage so the weekly cycle stays aligned
+        grid = np.arange(days.min(), days.max() + 1)
+        series = np.zeros(len(grid))
+        series[(days - grid[0]).astype(int)] = y
+        series = series[-HISTORY_DAYS:]
+        self.last_day = grid[-1]
+        phase = (grid[-len(series):].astype(int) + 3) % SEASON  # weekday, Monday = 0
+
+        if len(series) < 2 * SEASON:
+            # Seasonal naive: repeat the last week (or the mean of a shorter history)
+            self.level = float(series.mean())
+            seasonal = np.ones(SEASON)
+            if len(series) >= SEASON:
+                last_week = series[-SEASON:]
+                seasonal[phase[-SEASON:]] = last_week / max(last_week.mean(), 1e-9)
+            self.seasonal = seasonal
+            self.sigma = float(series.std()) if len(series) > 1 else float(series.mean()) * 0.25
+            self.alpha = 1.0
+            return self
+
+        # Initial weekday indices from whole weeks, then multiplicative smoothing
+        weeks = len(series) // SEASON
+        head = series[:weeks * SEASON].reshape(weeks, SEASON)
+        head_phase = phase[:SEASON]
+        seasonal = np.ones(SEASON)
+        seasonal[head_phase] = head.mean(axis=0) / max(head.mean(), 1e-9)
+        seasonal = np.where(seasonal > 0, seasonal, 1.0)
+
+        level = series[:SEASON].mean()
+        errors = np.empty(len(series))
+        for t, value in enumerate(series):
+            s = seasonal[phase[t]]
+            errors[t] = value - level * s
+            new_level = self.alpha * value / s + (1 - self.alpha) * level
+            seasonal[phase[t]] = self.gamma * value / max(new_level, 1e-9) + (1 - self.gamma) * s
+            level = new_level
+
+        self.level = float(level)
+        self.seasonal = seasonal
+        self.sigma = float(np.sqrt(np.mean(errors[SEASON:] ** 2)))
+        return self
+
+    def predict(self, df: pd.DataFrame) -> pd.DataFrame:
+        ds = pd.to_datetime(df["ds"])
+        days = ds.values.astype("datetime64[D]")
+        horizon = np.maximum((days - self.last_day).astype(int), 1)
+        phase = (days.astype(int) + 3) % SEASON
+
+        yhat = self.level * self.seasonal[phase]
+        # Simple exponential smoothing error variance grows with the horizon
+        spread = self.sigma * np.sqrt(1 + (horizon - 1) * self.alpha ** 2)
+        z = NormalDist().inv_cdf(0.5 + self.interval_width / 2)
+        return pd.DataFrame({
+            "ds": ds.values,
+            "yhat": yhat,
+            "yhat_lower": np.maximum(yhat - z * spread, 0.0),
+            "yhat_upper": yhat + z * spread,
+        })
+
+def load_usage_history(medicine: str, region: str, days: int = HISTORY_DAYS):
+    """Most recent ``days`` daily usage totals of one medicine from the region's database.
+
+    Looked up by name: each regional database numbers its medicines itself.
+    """
+    stmt = (
+        select(UsageHistory.date, func.sum(UsageHistory.quantity_used))
+        .join(Medicine, Medicine.medicine_id == UsageHistory.medicine_id)
+        .where(Medicine.name == medicine)
+        .group_by(UsageHistory.date)
+        .order_by(UsageHistory.date.desc())
+        .limit(days)
+    )
+    with get_region_engine(region).connect() as conn:
+        rows = conn.execute(stmt).all()[::-1]
+    dates = np.array([row[0] for row in rows], dtype="datetime64[D]")
+    quantities = np.array([row[1] for row in rows], dtype=float)
+    return dates, quantities
+
+def fit_fallback_model(medicine: str, region: str) -> FallbackModel:
+    dates, quantities = load_usage_history(medicine, region)
+    return FallbackModel().fit(dates, quantities)
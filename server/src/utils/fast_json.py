@@ -0,0 +1,49 @@
+import os
+from typing import Iterable, Iterator, Sequence
+
+import orjson
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+
+from ..database import SessionLocal
+
+FAST_JSON_CHUNK_SIZE = int(os.getenv("FAST_JSON_CHUNK_SIZE", "2000"))
+
+def iter_json_array(
+    rows: Iterable[Sequence],
+    fields: Sequence[str],
+    chunk_size: int = FAST_JSON_CHUNK_SIZE
+) -> Iterator[bytes]:
+    """Encode row tuples as a JSON array of objects, one chunk at a time."""
+    yield b"["
+    first = True
+    chunk = []
+    for row in rows:
+        chunk.append(dict(zip(fields, row)))
+        if len(chunk) >= chunk_size:
+            yield (b"" if first else b",") + orjson.dumps(chunk)[1:-1]
+            first = False
+            chunk = []
+    if chunk:
+        yield (b"" if first else b",") + orjson.dumps(chunk)[1:-1]
+    yield b"]"
+
+def stream_query(columns: dict, chunk_size: int = FAST_JSON_CHUNK_SIZE) -> StreamingResponse:
+    """Stream the given ``{field: column}`` selection as a JSON array.
+
+    Only the listed columns are selected, rows stay plain tuples and are fetched
+    from a server-side cursor in ``chunk_size`` blocks. The session is owned by
+    the generator because request dependencies are closed before the body is sent.
+    """
+    fields = list(columns.keys())
+    stmt = select(*columns.values()).execution_options(yield_per=chunk_size)
+
+    def generate():
+        db = SessionLocal()
+        try:
+            rows = db.execute(stmt).tuples()
+            yield from iter_json_array(rows, fields, chunk_size)
+        finally:
+            db.close()
+
+    return StreamingResponse(generate(), media_type="application/json")
@@ -0,0 +1,107 @@
+import numpy as np
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Columns worth keeping from a Prophet forecast frame. The *_lower/*_upper
+# component copies, the summed *_terms and the empty extra_regressors_* columns
+# are all derivable or constant and are dropped.
+FORECAST_COLUMNS = {
+    "yhat": np.float32,
+    "yhat_lower": np.float32,
+    "yhat_upper": np.float32,
+    "trend": np.float32,
+    "weekly": np.float32,
+    "yearly": np.float32,
+    "special_event": np.float32,
+}
+INDEX_FILE = "index.json"
+
+class ForecastStore:
+    """Memory-mapped forecast artifacts, one ``.npy`` file per column.
+
+    All series are concatenated in (region, medicine, ds) order and
+    ``index.json`` maps ``"{region}/{medicine}"`` to its row range, so a
+    date slice touches only the pages it needs.
+    """
+
+    def __init__(self, store_dir: Path):
+        self.store_dir = Path(store_dir)
+        with open(self.store_dir / INDEX_FILE) as f:
+            self.index = json.load(f)
+        self._columns = {}
+
+    def _column(self, name: str) -> np.ndarray:
+        if name not in self._columns:
+            self._columns[name] = np.load(self.store_dir / f"{name}.npy", mmap_mode="r")
+        return self._columns[name]
+
+    def keys(self):
+        return [tuple(key.split("/")) for key in self.index["series"]]
+
+    def _row_range(self, region: str, medicine: str, start, end) -> Tuple[int, int]:
+        key = f"{region}/{medicine.lower()}"
+        if key not in self.index["series"]:
+            raise KeyError(f"No forecast stored for {medicine} in {region}")
+        offset, length = self.index["series"][key]
+        ds = self._column("ds")[offset:offset + length]
+        lo = 0 if start is None else int(np.searchsorted(ds, np.datetime64(start, "D"), side="left"))
+        hi = length if end is None else int(np.searchsorted(ds, np.datetime64(end, "D"), side="right"))
+        return offset + lo, offset + hi
+
+    def load(
+        self,
+        region: str,
+        medicine: str,
+        start=None,
+        end=None,
+        columns: Optional[list] = None
+    ) -> Dict[str, np.ndarray]:
+        """Load the rows of one series with ``start <= ds <= end`` (both optional)."""
+        lo, hi = self._row_range(region, medicine, start, end)
+        names = ["ds"] + list(columns or FORECAST_COLUMNS)
+        return {name: np.array(self._column(name)[lo:hi]) for name in names}
+
+    def load_frame(self, region: str, medicine: str, start=None, end=None, columns=None):
+        """Same as ``load`` but returns a pandas DataFrame."""
+        import pandas as pd
+        return pd.DataFrame(self.load(region, medicine, start, end, columns))
+
+def convert_forecast_csvs(csv_dir: Path, store_dir: Path) -> ForecastStore:
+    """Convert ``{region}_{medicine}_forecast.csv`` files into a ForecastStore."""
+    import pandas as pd
+
+    csv_dir, store_dir = Path(csv_dir), Path(store_dir)
+    store_dir.mkdir(parents=True, exist_ok=True)
+
+    parts = {name: [] for name in ["ds", *FORECAST_COLUMNS]}
+    series = {}
+    offset = 0
+    for path in sorted(csv_dir.glob("*_forecast.csv")):
+        region, medicine = path.stem[:-len("_forecast")].split("_", 1)
+        df = pd.read_csv(path, usecols=["ds", *FORECAST_COLUMNS])
+        df = df.sort_values("ds")
+        parts["ds"].append(pd.to_datetime(df["ds"]).to_numpy().astype("datetime64[D]"))
+        for name, dtype in FORECAST_COLUMNS.items():
+            parts[name].append(df[name].to_numpy(dtype=dtype))
+        series[f"{region}/{medicine.lower()}"] = [offset, len(df)]
+        offset += len(df)
+        logger.info(f"Converted {path.name}: {len(df)} rows")
+
+    for name, chunks in parts.items():
+        np.save(store_dir / f"{name}.npy", np.concatenate(chunks))
+    with open(store_dir / INDEX_FILE, "w") as f:
+        json.dump({"columns": list(parts), "series": series}, f, indent=2)
+
+    return ForecastStore(store_dir)
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) != 3:
+        print("Usage: python -m src.utils.forecast_store <csv_dir> <store_dir>")
+        sys.exit(1)
+
+    convert_forecast_csvs(Path(sys.argv[1]), Path(sys.argv[2]))
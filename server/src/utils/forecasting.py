@@ -0,0 +1,88 @@
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from ..database import REGION_DATABASE_URLS, SessionLocal
+from ..models import Medicine, Prediction
+from .intervals import INTERVAL_MODE
+from .metrics import model_operation_duration
+from .model_registry import ModelRegistry
+from .rollups import materialize_rollups, refresh_rollups
+
+logger = logging.getLogger(__name__)
+
+MODEL_DIR = Path("models")
+FORECAST_HORIZON_DAYS = 90
+
+def forecast_series(db: Session, medicine: Medicine, region: str, model,
+                    interval_mode: str = INTERVAL_MODE, now: Optional[datetime] = None) -> List[Prediction]:
+    """Replace the stored future forecast and rollups of one series. The caller commits."""
+    # Heavy ML dependencies are only loaded once a forecast has to be made
+    import pandas as pd
+    from .intervals import predict_with_intervals
+
+    now = now or datetime.now()
+    engine = getattr(model, "engine", "prophet")
+    future_dates = pd.date_range(start=now, periods=FORECAST_HORIZON_DAYS, freq='D')
+    with model_operation_duration.time(operation="predict", engine=engine):
+        forecast = predict_with_intervals(model, pd.DataFrame({'ds': future_dates}), interval_mode)
+
+    db.query(Prediction).filter(
+        Prediction.medicine_id == medicine.medicine_id,
+        Prediction.region == region,
+        Prediction.date >= now
+    ).delete(synchronize_session=False)
+    predictions = [
+        Prediction(
+            medicine_id=medicine.medicine_id,
+            region=region,
+            date=ds.to_pydatetime(),
+            predicted_demand=float(yhat),
+            confidence_interval=float(upper - lower),
+            engine=engine,
+            interval_mode=interval_mode
+        )
+        for ds, yhat, lower, upper in zip(
+            forecast['ds'], forecast['yhat'], forecast['yhat_lower'], forecast['yhat_upper']
+        )
+    ]
+    db.add_all(predictions)
+    materialize_rollups(db, medicine.medicine_id, region, predictions)
+    return predictions
+
+def forecast_all(regions: Optional[list] = None, model_dir: Path = MODEL_DIR,
+                 interval_mode: str = INTERVAL_MODE) -> int:
+    """Store fresh forecasts and rollups for every series with a published model.
+
+    Runs after training so /api/predictions/rollups covers every medicine,
+    not only those whose daily forecast someone happened to request. Each
+    series is committed on its own; rollups of series without a future
+    forecast are then expired.
+    """
+    count = 0
+    db = SessionLocal()
+    try:
+        medicines = db.query(Medicine).all()
+        for region in regions or list(REGION_DATABASE_URLS):
+            for medicine in medicines:
+                # A registry per series keeps only one model in memory at a time
+                registry = ModelRegistry(model_dir)
+                if not registry.exists(region, medicine.name):
+                    continue
+                try:
+                    model, _ = registry.load(region, medicine.name)
+                    forecast_series(db, medicine, region, model, interval_mode)
+                    db.commit()
+                    count += 1
+                except Exception as e:
+                    db.rollback()
+                    logger.error(f"Error forecasting {medicine.name} in {region}: {str(e)}")
+        refresh_rollups(db)
+        db.commit()
+    finally:
+        db.close()
+    logger.info(f"Stored forecasts for {count} series")
+    return count
@@ -0,0 +1,257 @@
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+import json
+import logging
+import os
+import time
+
+from .model_training import ModelTrainer
+
+logger = logging.getLogger(__name__)
+
+# Optional JSON with special-event dates per region ({"delhi": ["2020-10-25", ...]});
+# pandemic windows come from each regional database's pandemics table
+FORECAST_EVENTS_FILE = os.getenv("FORECAST_EVENTS_FILE")
+
+DEFAULT_PARAMS = {
+    "ridge_alpha": 1.0,
+    "yearly_order": 10,
+    "n_changepoints": 10,
+    "changepoint_range": 0.8,
+    "interval_width": 0.8,
+}
+ALPHA_GRID = [0.01, 0.1, 1.0, 10.0, 100.0]
+
+def _as_days(values) -> np.ndarray:
+    return np.asarray(pd.to_datetime(values).values, dtype="datetime64[D]")
+
+def _window_feature(days: np.ndarray, start, end, ramp_days: int = 14) -> np.ndarray:
+    """Trapezoid that ramps up after ``start`` and back down before ``end``."""
+    start, end = np.datetime64(start, "D"), np.datetime64(end, "D")
+    ramp = max(1, min(ramp_days, int((end - start).astype(int)) // 4))
+    up = (days - start).astype(float) / ramp
+    down = (end - days).astype(float) / ramp
+    return np.clip(np.minimum(up, down), 0.0, 1.0)
+
+def _event_feature(days: np.ndarray, event, width: int = 5) -> np.ndarray:
+    distance = np.abs((days - np.datetime64(event, "D")).astype(float))
+    return np.clip(1.0 - distance / width, 0.0, 1.0)
+
+def read_events_file(path: Path) -> dict:
+    """Events as written by dataset/generate_data.py: pandemics and special events"""
+    events = json.loads(Path(path).read_text())
+    return {
+        "pandemics": [tuple(window) for window in events.get("pandemics", [])],
+        "special_events": list(events.get("special_events", [])),
+    }
+
+def load_region_events(connection, region: str) -> dict:
+    """Pandemic windows from the region's database, special events from FORECAST_EVENTS_FILE"""
+    from sqlalchemy import select
+    from ..models import Pandemic
+
+    rows = connection.execute(
+        select(Pandemic.start_date, Pandemic.end_date).order_by(Pandemic.start_date)
+    ).all()
+    special_events = []
+    if FORECAST_EVENTS_FILE:
+        special_events = json.loads(Path(FORECAST_EVENTS_FILE).read_text()).get(region, [])
+    return {
+        "pandemics": [(str(start), str(end)) for start, end in rows],
+        "special_events": list(special_events),
+    }
+
+def design_matrix(ds, t0, t_end, events: dict, params: dict) -> np.ndarray:
+    """Shared features: trend with changepoints, yearly Fourier, weekday and events."""
+    days = _as_days(ds)
+    t0, t_end = np.datetime64(t0, "D"), np.datetime64(t_end, "D")
+    span = max(1.0, float((t_end - t0).astype(int)))
+    t = (days - t0).astype(float) / span
+
+    columns = [np.ones_like(t), t]
+    for cp in np.linspace(0, params["changepoint_range"], params["n_changepoints"] + 1)[1:]:
+        columns.append(np.maximum(t - cp, 0.0))
+
+    day_of_year = (days - days.astype("datetime64[Y]")).astype(float)
+    for k in range(1, params["yearly_order"] + 1):
+        angle = 2 * np.pi * k * day_of_year / 365.25
+        columns.extend([np.sin(angle), np.cos(angle)])
+
+    weekday = (days.astype(int) + 3) % 7  # 1970-01-01 was a Thursday
+    for d in range(1, 7):
+        columns.append((weekday == d).astype(float))
+
+    for start, end in events.get("pandemics", []):
+        columns.append(_window_feature(days, start, end))
+    if events.get("special_events"):
+        columns.append(sum(_event_feature(days, event) for event in events["special_events"]))
+
+    return np.column_stack(columns)
+
+def solve_ridge(X: np.ndarray, Y: np.ndarray, mask: np.ndarray, alpha: float) -> np.ndarray:
+    """Per-series ridge coefficients for every column of ``Y`` at once.
+
+    Fully observed series share X'X and are solved as one multi-RHS system;
+    series with gaps get their own normal equations, built and solved batched.
+    """
+    n_features = X.shape[1]
+    penalty = alpha * np.eye(n_features)
+    penalty[0, 0] = 0.0  # leave the intercept unpenalised
+
+    coef = np.zeros((Y.shape[1], n_features))
+    Y = np.where(mask, Y, 0.0)
+    full = mask.all(axis=0)
+    if full.any():
+        coef[full] = np.linalg.solve(X.T @ X + penalty, X.T @ Y[:, full]).T
+    if (~full).any():
+        M = mask[:, ~full].astype(float)
+        outer = (X[:, :, None] * X[:, None, :]).reshape(len(X), -1)
+        A = (M.T @ outer).reshape(-1, n_features, n_features) + penalty
+        b = Y[:, ~full].T @ X
+        coef[~full] = np.linalg.solve(A, b[..., None])[..., 0]
+    return coef
+
+class GlobalSeriesModel:
+    """One fitted series from a global run; predicts like a Prophet model."""
+
+    engine = "global"
+
+    def __init__(self, region: str, coef: np.ndarray, sigma: float, t0, t_end, params: dict, events: dict):
+        self.region = region
+        # The events it was fitted with, so predictions build the same columns
+        self.events = events
+        self.coef = coef
+        self.sigma = sigma
+        self.t0 = str(t0)
+        self.t_end = str(t_end)
+        self.options = params
+
+    @property
+    def params(self) -> dict:
+        return {**self.options, "engine": "global", "region": self.region, "sigma": self.sigma}
+
+    def predict(self, df: pd.DataFrame) -> pd.DataFrame:
+        from statistics import NormalDist
+
+        X = design_matrix(df["ds"], self.t0, self.t_end, self.events, self.options)
+        log_yhat = X @ self.coef
+        z = NormalDist().inv_cdf(0.5 + self.options["interval_width"] / 2)
+        return pd.DataFrame({
+            "ds": pd.to_datetime(df["ds"]).values,
+            "yhat": np.expm1(log_yhat),
+            "yhat_lower": np.expm1(log_yhat - z * self.sigma),
+            "yhat_upper": np.expm1(log_yhat + z * self.sigma),
+        })
+
+class GlobalModelTrainer(ModelTrainer):
+    """Fits every (region, medicine) series in one vectorized pass.
+
+    Demand is modelled in log space (multiplicative seasonality, like the
+    notebook Prophet models) on a shared design matrix per region, so a
+    whole region is one linear solve instead of one Prophet fit per series.
+    ``events`` maps a region to its pandemic windows and special events;
+    regions without an entry use ``<data_dir>/<region>/events.json`` if the
+    dataset has one.
+    """
+
+    def __init__(self, data_dir: Path, model_dir: Path, events: Optional[Dict[str, dict]] = None):
+        super().__init__(data_dir, model_dir)
+        self.events = dict(events or {})
+
+    def events_for(self, region: str) -> dict:
+        if region not in self.events:
+            path = self.data_dir / region / "events.json"
+            self.events[region] = read_events_file(path) if path.exists() else {}
+        return self.events[region]
+
+    def _align(self, frames: Dict[str, pd.DataFrame]):
+        """Stack series onto a common daily grid with a missing-value mask."""
+        starts = [df["ds"].min() for df in frames.values()]
+        ends = [df["ds"].max() for df in frames.values()]
+        grid = pd.date_range(min(starts), max(ends), freq="D")
+        wide = pd.concat(
+            {key: df.set_index("ds")["y"].groupby(level=0).sum() for key, df in frames.items()},
+            axis=1
+        ).reindex(grid)
+        Y = np.log1p(np.clip(wide.to_numpy(dtype=float), 0, None))
+        return grid, Y, ~np.isnan(Y)
+
+    def _fit_region(self, region: str, frames: Dict[str, pd.DataFrame], params: dict, holdout: int = 0):
+        grid, Y, mask = self._align(frames)
+        X = design_matrix(grid, grid[0], grid[-1], self.events_for(region), params)
+        fit_mask = mask.copy()
+        if holdout:
+            fit_mask[-holdout:] = False
+        coef = solve_ridge(X, Y, fit_mask, params["ridge_alpha"])
+        residuals = np.where(fit_mask, Y - X @ coef.T, np.nan)
+        sigma = np.sqrt(np.nanmean(residuals ** 2, axis=0))
+        return grid, X, Y, mask, coef, sigma
+
+    def tune_hyperparameters(self, df: pd.DataFrame, region: str = "", holdout: int = 90) -> dict:
+        """Pick the ridge penalty by error on the last ``holdout`` days"""
+        return self.tune_batch({region: {"series": df}}, holdout)
+
+    def tune_batch(self, frames_by_region: Dict[str, Dict[str, pd.DataFrame]], holdout: int = 90) -> dict:
+        """Pick one ridge penalty for all series by pooled holdout RMSE in log space"""
+        best_params, best_rmse = dict(DEFAULT_PARAMS), float("inf")
+        for alpha in ALPHA_GRID:
+            params = {**DEFAULT_PARAMS, "ridge_alpha": alpha}
+            errors = []
+            for region, frames in frames_by_region.items():
+                _, X, Y, mask, coef, _ = self._fit_region(region, frames, params, holdout)
+                err = (Y - X @ coef.T)[-holdout:]
+                errors.append(err[mask[-holdout:]])
+            rmse = float(np.sqrt(np.mean(np.concatenate(errors) ** 2)))
+            logger.info(f"ridge_alpha={alpha}: holdout log-RMSE {rmse:.4f}")
+            if rmse < best_rmse:
+                best_rmse, best_params = rmse, params
+        return best_params
+
+    def train_model(self, df: pd.DataFrame, params: dict, region: str = "") -> GlobalSeriesModel:
+        """Train a single series (same interface as ModelTrainer.train_model)"""
+        return self.train_batch({region: {"series": df}}, params)[(region, "series")]
+
+    def train_batch(
+        self,
+        frames_by_region: Dict[str, Dict[str, pd.DataFrame]],
+        params: dict = None
+    ) -> Dict[Tuple[str, str], GlobalSeriesModel]:
+        """Train every ``{region: {medicine: df}}`` series, one solve per region"""
+        params = {**DEFAULT_PARAMS, **(params or {})}
+        models = {}
+        for region, frames in frames_by_region.items():
+            start = time.perf_counter()
+            grid, _, _, _, coef, sigma = self._fit_region(region, frames, params)
+            for i, medicine in enumerate(frames):
+                models[(region, medicine)] = GlobalSeriesModel(
+                    region, coef[i], float(sigma[i]), grid[0].date(), grid[-1].date(), params,
+                    self.events_for(region)
+                )
+            logger.info(f"Fitted {len(frames)} series for {region} in {time.perf_counter() - start:.3f}s")
+        return models
+
+    def load_region(self, region: str) -> Dict[str, pd.DataFrame]:
+        """Load every processed series of a region"""
+        return {
+            path.name[:-len("_prophet.csv")]: self.load_data(region, path.name[:-len("_prophet.csv")])
+            for path in sorted((self.data_dir / region / "processed").glob("*_prophet.csv"))
+        }
+
+def train_global_models(data_dir: Path = Path("dataset/data"), model_dir: Path = Path("models"), tune: bool = True):
+    """Train and save global models for every region and medicine under ``data_dir``"""
+    trainer = GlobalModelTrainer(data_dir=data_dir, model_dir=model_dir)
+    frames_by_region = {
+        region.name: trainer.load_region(region.name)
+        for region in sorted(data_dir.iterdir()) if region.is_dir()
+    }
+    params = trainer.tune_batch(frames_by_region) if tune else dict(DEFAULT_PARAMS)
+    models = trainer.train_batch(frames_by_region, params)
+    for (region, medicine), model in models.items():
+        trainer.save_model(model, region, medicine, params=model.params, df=frames_by_region[region][medicine],
+                           metrics={'residual_sigma': model.sigma})
+    return models
+
+if __name__ == "__main__":
+    train_global_models()
@@ -0,0 +1,110 @@
+import copy
+import os
+from statistics import NormalDist
+
+# numpy and pandas are imported inside the functions: the predictions route
+# imports the mode settings at startup, before any model is loaded.
+
+# full:     Prophet's own simulation with the model's uncertainty_samples (1000 by default)
+# reduced:  the same simulation with INTERVAL_REDUCED_SAMPLES draws
+# residual: no simulation; training residual quantiles widened by the analytic
+#           variance of Prophet's future trend changes
+# none:     point forecast only, yhat_lower == yhat_upper == yhat
+INTERVAL_MODES = ("full", "reduced", "residual", "none")
+INTERVAL_MODE = os.getenv("INTERVAL_MODE", "full")
+INTERVAL_REDUCED_SAMPLES = int(os.getenv("INTERVAL_REDUCED_SAMPLES", "100"))
+
+def check_interval_mode(mode: str):
+    if mode not in INTERVAL_MODES:
+        raise ValueError(f"interval mode must be one of {', '.join(INTERVAL_MODES)}")
+
+def _is_prophet(model) -> bool:
+    return hasattr(model, "uncertainty_samples")
+
+def _with_regressors(model, df):
+    # Notebook models carry a special_event regressor; unknown future events are 0
+    missing = [name for name in getattr(model, "extra_regressors", {}) if name not in df]
+    return df.assign(**{name: 0.0 for name in missing}) if missing else df
+
+def fit_residual_intervals(model, df=None) -> dict:
+    """Compute and attach what the ``residual`` mode needs; cheap enough to run after every fit.
+
+    Residuals are relative to yhat for multiplicative models. The trend term
+    follows Prophet's predictive trend: changepoints arrive at rate S per unit
+    of scaled time with Laplace(0, mean|delta|) rate changes, so the trend
+    variance ``h`` units past the history is ``S * 2 * lambda^2 * h^3 / 3``.
+    """
+    import numpy as np
+
+    df = model.history if df is None else df
+    point = copy.copy(model)
+    point.uncertainty_samples = 0
+    yhat = point.predict(_with_regressors(model, df[["ds"] + list(model.extra_regressors)]))["yhat"].values
+    y = df["y"].values
+
+    relative = model.seasonality_mode == "multiplicative"
+    residuals = (y - yhat) / np.maximum(yhat, 1e-9) if relative else y - yhat
+    tail = (1 - model.interval_width) / 2
+    scale = float(np.mean(np.abs(model.params["delta"]))) + 1e-8
+    info = {
+        "relative": relative,
+        "lower": float(np.quantile(residuals, tail)),
+        "upper": float(np.quantile(residuals, 1 - tail)),
+        "trend_variance_rate": len(model.changepoints_t) * 2 * scale ** 2 / 3,
+        "interval_width": model.interval_width,
+    }
+    model.residual_intervals = info
+    return info
+
+def _residual_bounds(model, df, forecast):
+    import numpy as np
+    import pandas as pd
+
+    info = getattr(model, "residual_intervals", None) or fit_residual_intervals(model)
+    z = NormalDist().inv_cdf(0.5 + info["interval_width"] / 2)
+    t = ((pd.to_datetime(df["ds"]) - model.start) / model.t_scale).values
+    trend_sd = np.sqrt(info["trend_variance_rate"] * np.clip(t - 1, 0, None) ** 3) * model.y_scale
+    yhat = forecast["yhat"].values
+    if info["relative"]:
+        trend_sd = trend_sd / np.maximum(np.abs(forecast["trend"].values), 1e-9)
+    lower = np.sqrt(info["lower"] ** 2 + (z * trend_sd) ** 2)
+    upper = np.sqrt(info["upper"] ** 2 + (z * trend_sd) ** 2)
+    if info["relative"]:
+        return yhat * (1 - lower), yhat * (1 + upper)
+    return yhat - lower, yhat + upper
+
+def predict_with_intervals(model, df, mode: str = None):
+    """``model.predict(df)`` with the requested interval mode (default INTERVAL_MODE).
+
+    Non-Prophet engines already compute their intervals analytically, so
+    every mode except ``none`` leaves them unchanged. The model itself is
+    never mutated, so it can be shared between requests.
+    """
+    mode = mode or INTERVAL_MODE
+    check_interval_mode(mode)
+
+    if not _is_prophet(model):
+        forecast = model.predict(df)
+        if mode == "none":
+            forecast["yhat_lower"] = forecast["yhat_upper"] = forecast["yhat"]
+        return forecast
+
+    df = _with_regressors(model, df)
+    if mode == "full":
+        return model.predict(df)
+
+    shared = model
+    model = copy.copy(model)
+    if mode == "reduced":
+        model.uncertainty_samples = min(INTERVAL_REDUCED_SAMPLES, shared.uncertainty_samples or INTERVAL_REDUCED_SAMPLES)
+        return model.predict(df)
+
+    model.uncertainty_samples = 0
+    forecast = model.predict(df)
+    if mode == "none":
+        forecast["yhat_lower"] = forecast["yhat_upper"] = forecast["yhat"]
+    else:
+        # Quantiles are attached to the shared model, so models trained before
+        # this mode existed compute them once per load
+        forecast["yhat_lower"], forecast["yhat_upper"] = _residual_bounds(shared, df, forecast)
+    return forecast
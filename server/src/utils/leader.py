@@ -0,0 +1,188 @@
+import json
+import logging
+import os
+import socket
+import tempfile
+import threading
+import zlib
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+
+from ..database import engine
+
+logger = logging.getLogger(__name__)
+
+# "auto" picks a Postgres advisory lock when the database is Postgres, else a lock file
+SCHEDULER_LOCK = os.getenv("SCHEDULER_LOCK", "auto")
+SCHEDULER_LOCK_DIR = Path(os.getenv("SCHEDULER_LOCK_DIR", tempfile.gettempdir()))
+SCHEDULER_LEADER_POLL_SECONDS = float(os.getenv("SCHEDULER_LEADER_POLL_SECONDS", "30"))
+
+def worker_id() -> str:
+    # Evaluated per call: with gunicorn --preload the module is imported before forking
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+class FileLock:
+    """Exclusive lock on a local file; released by the OS if the holder dies."""
+
+    def __init__(self, name: str):
+        self.path = SCHEDULER_LOCK_DIR / f"medismart-{name}.lock"
+        self._file = None
+
+    def acquire(self, info: dict) -> bool:
+        handle = open(self.path, "a+")
+        try:
+            if os.name == "nt":
+                import msvcrt
+                msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return False
+        handle.seek(0)
+        handle.truncate()
+        handle.write(json.dumps(info))
+        handle.flush()
+        self._file = handle
+        return True
+
+    def alive(self) -> bool:
+        return self._file is not None
+
+    def holder(self) -> dict:
+        try:
+            return json.loads(self.path.read_text() or "null")
+        except (OSError, ValueError):
+            return None
+
+    def release(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+class PostgresAdvisoryLock:
+    """Session-level advisory lock held on a dedicated connection.
+
+    If the leader process dies its session ends and Postgres drops the lock.
+    The holder is read back from pg_stat_activity via the connection's
+    application_name.
+    """
+
+    def __init__(self, name: str):
+        self.key = zlib.crc32(name.encode()) & 0x7FFFFFFF
+        self._connection = None
+
+    def acquire(self, info: dict) -> bool:
+        lock_engine = create_engine(
+            engine.url,
+            poolclass=NullPool,
+            connect_args={"application_name": f"medismart-scheduler {info['worker']}"}
+        )
+        connection = lock_engine.connect()
+        if connection.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": self.key}).scalar():
+            connection.commit()
+            self._connection = connection
+            return True
+        connection.close()
+        return False
+
+    def alive(self) -> bool:
+        try:
+            self._connection.execute(text("SELECT 1"))
+            self._connection.commit()
+            return True
+        except Exception:
+            self.release()
+            return False
+
+    def holder(self) -> dict:
+        with engine.connect() as connection:
+            row = connection.execute(text(
+                "SELECT a.application_name, a.pid, a.backend_start "
+                "FROM pg_locks l JOIN pg_stat_activity a ON a.pid = l.pid "
+                "WHERE l.locktype = 'advisory' AND l.classid = 0 AND l.objid = :key AND l.granted"
+            ), {"key": self.key}).first()
+        if row is None:
+            return None
+        return {
+            "worker": row.application_name.replace("medismart-scheduler ", ""),
+            "database_pid": row.pid,
+            "since": row.backend_start.isoformat(),
+        }
+
+    def release(self):
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except Exception:
+                pass
+            self._connection = None
+
+class LeaderElection:
+    """Elects one process among all workers to own a job schedule.
+
+    Every worker calls ``start``; the one that wins the lock gets
+    ``on_elected``. The others retry every ``poll_seconds`` so a new leader
+    takes over when the old one exits or loses its database session.
+    """
+
+    def __init__(self, name: str, on_elected, on_lost=None,
+                 backend: str = SCHEDULER_LOCK, poll_seconds: float = SCHEDULER_LEADER_POLL_SECONDS):
+        if backend == "auto":
+            backend = "postgres" if engine.dialect.name == "postgresql" else "file"
+        self.name = name
+        self.backend = backend
+        self.lock = PostgresAdvisoryLock(name) if backend == "postgres" else FileLock(name)
+        self.on_elected = on_elected
+        self.on_lost = on_lost
+        self.poll_seconds = poll_seconds
+        self.is_leader = False
+        self.elected_at = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._check()
+        self._thread = threading.Thread(target=self._run, name=f"{self.name}-election", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self.is_leader:
+            self.lock.release()
+            self.is_leader = False
+
+    def _run(self):
+        while not self._stop.wait(self.poll_seconds):
+            self._check()
+
+    def _check(self):
+        try:
+            if self.is_leader:
+                if not self.lock.alive():
+                    logger.warning(f"Worker {worker_id()} lost leadership of {self.name}")
+                    self.is_leader = False
+                    if self.on_lost:
+                        self.on_lost()
+                return
+            info = {"worker": worker_id(), "since": datetime.now().isoformat()}
+            if self.lock.acquire(info):
+                self.is_leader = True
+                self.elected_at = info["since"]
+                logger.info(f"Worker {worker_id()} elected leader of {self.name} ({self.backend} lock)")
+                self.on_elected()
+        except Exception as e:
+            logger.error(f"Leader election for {self.name} failed: {str(e)}")
+
+    def status(self) -> dict:
+        return {
+            "name": self.name,
+            "backend": self.backend,
+            "worker": worker_id(),
+            "is_leader": self.is_leader,
+            "leader": {"worker": worker_id(), "since": self.elected_at} if self.is_leader else self.lock.holder(),
+        }
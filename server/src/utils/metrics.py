@@ -0,0 +1,449 @@
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# In-process metrics rendered in the Prometheus text format. With METRICS_DIR
+# set, every process also writes its values to METRICS_DIR/<pid>.db and
+# /metrics merges all processes on the host, so any gunicorn worker can answer
+# a scrape. Empty the directory before the server starts.
+METRICS_DIR = os.getenv("METRICS_DIR")
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+TRAINING_BUCKETS = (0.1, 0.5, 1.0, 5.0, 15.0, 30.0, 60.0, 300.0, 900.0, 3600.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 500)
+
+# How a gauge combines the values of several processes; "live" modes ignore
+# processes that have exited, the others keep their last value
+GAUGE_MODES = ("livesum", "liveall", "sum", "max", "min")
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names, values, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class _ValueFile:
+    """Float samples of one process in a memory-mapped file.
+
+    A header holding the bytes in use is followed by ``(key length, JSON key,
+    value)`` entries aligned to 8 bytes. Entries are appended once and then
+    updated in place, so readers in other processes never need a lock.
+    """
+
+    INITIAL_SIZE = 64 * 1024
+
+    def __init__(self, path: Path):
+        self._lock = threading.Lock()
+        self._file = open(path, "a+b")
+        if os.fstat(self._file.fileno()).st_size == 0:
+            self._file.truncate(self.INITIAL_SIZE)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        self._used = struct.unpack_from("i", self._map, 0)[0] or 8
+        self._positions = {
+            tuple(json.loads(key)): position for key, position, _ in self._entries(self._map, self._used)
+        }
+
+    @staticmethod
+    def _entries(data, used: int):
+        position = 8
+        while position < used:
+            length = struct.unpack_from("i", data, position)[0]
+            key_end = position + 4 + length
+            value_position = key_end + (-key_end % 8)
+            yield data[position + 4:key_end].decode(), value_position, struct.unpack_from("d", data, value_position)[0]
+            position = value_position + 8
+
+    @classmethod
+    def read(cls, path: Path) -> dict:
+        data = path.read_bytes()
+        if len(data) < 8:
+            return {}
+        used = struct.unpack_from("i", data, 0)[0]
+        return {tuple(json.loads(key)): value for key, _, value in cls._entries(data, used)}
+
+    def write(self, key: tuple, value: float):
+        self.write_many([(key, value)])
+
+    def write_many(self, samples):
+        with self._lock:
+            for key, value in samples:
+                position = self._positions.get(key)
+                if position is None:
+                    position = self._append(key)
+                struct.pack_into("d", self._map, position, value)
+
+    def _append(self, key: tuple) -> int:
+        encoded = json.dumps(key).encode()
+        key_end = self._used + 4 + len(encoded)
+        position = key_end + (-key_end % 8)
+        while position + 8 > len(self._map):
+            self._file.truncate(len(self._map) * 2)
+            self._map = mmap.mmap(self._file.fileno(), 0)
+        struct.pack_into(f"i{len(encoded)}s", self._map, self._used, len(encoded), encoded)
+        struct.pack_into("d", self._map, position, 0.0)
+        # Published last so readers only see complete entries
+        self._used = position + 8
+        struct.pack_into("i", self._map, 0, self._used)
+        self._positions[key] = position
+        return position
+
+_process_file = {"pid": None, "file": None}
+_process_file_lock = threading.Lock()
+
+def _values_file():
+    """This process's value file, or None outside multiprocess mode"""
+    if not METRICS_DIR:
+        return None
+    pid = os.getpid()
+    if _process_file["pid"] != pid:
+        with _process_file_lock:
+            if _process_file["pid"] != pid:
+                if _process_file["pid"] is not None:
+                    # Forked after recording: those values belong to the parent's file
+                    for metric in REGISTRY:
+                        metric._values.clear()
+                directory = Path(METRICS_DIR)
+                directory.mkdir(parents=True, exist_ok=True)
+                # Left behind by an exited process that had the same pid
+                _archive_dead_processes(directory, [directory / f"{pid}.db"])
+                _process_file["file"] = _ValueFile(directory / f"{pid}.db")
+                _process_file["pid"] = pid
+    return _process_file["file"]
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(labels.get(name, "") for name in self.label_names)
+
+    def _publish(self, key: tuple, value: float):
+        values_file = _values_file()
+        if values_file is not None:
+            values_file.write((self.name, "", *key), value)
+
+    def _merge(self, merged: dict, samples: dict, pid: str) -> None:
+        """Add one process's ``{(part, *labels): value}`` samples to ``merged``"""
+        for (_, *key), value in samples.items():
+            key = tuple(key)
+            merged[key] = merged.get(key, 0) + value
+
+    def render(self, values: dict = None, label_names: tuple = None) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        if values is None:
+            with self._lock:
+                values = dict(self._values)
+        for key, value in values.items():
+            lines.append(f"{self.name}{_format_labels(label_names or self.label_names, key)} {value}")
+        return lines
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+            self._publish(key, self._values[key])
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labels=(), mode: str = "livesum"):
+        if mode not in GAUGE_MODES:
+            raise ValueError(f"Unknown gauge mode {mode!r}")
+        super().__init__(name, documentation, labels)
+        self.mode = mode
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+            self._publish(key, value)
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+            self._publish(key, self._values[key])
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def _merge(self, merged: dict, samples: dict, pid: str) -> None:
+        if self.mode.startswith("live") and pid == "archive":
+            return
+        for (_, *key), value in samples.items():
+            key = tuple(key)
+            if self.mode == "liveall":
+                merged[key + (pid,)] = value
+            elif key not in merged or self.mode in ("livesum", "sum"):
+                merged[key] = merged.get(key, 0) + value
+            else:
+                merged[key] = (max if self.mode == "max" else min)(merged[key], value)
+
+    def render(self, values: dict = None, label_names: tuple = None) -> list:
+        if values is not None and self.mode == "liveall":
+            label_names = self.label_names + ("pid",)
+        return super().render(values, label_names)
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+        self._parts = tuple(str(bound) for bound in self.buckets) + ("sum", "count")
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total, count = self._values.get(key, ([0] * len(self.buckets), 0.0, 0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value, count + 1)
+            values_file = _values_file()
+            if values_file is not None:
+                values = (*counts, total + value, count + 1)
+                values_file.write_many(((self.name, part, *key), v) for part, v in zip(self._parts, values))
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _merge(self, merged: dict, samples: dict, pid: str) -> None:
+        parts = {part: i for i, part in enumerate(self._parts[:-2])}
+        for (part, *key), value in samples.items():
+            counts, total, count = merged.get(tuple(key), ([0] * len(self.buckets), 0.0, 0))
+            if part == "sum":
+                total += value
+            elif part == "count":
+                count += int(value)
+            elif part in parts:
+                counts[parts[part]] += int(value)
+            merged[tuple(key)] = (counts, total, count)
+
+    def render(self, values: dict = None, label_names: tuple = None) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        if values is None:
+            with self._lock:
+                values = {key: (list(counts), total, count) for key, (counts, total, count) in self._values.items()}
+        for key, (counts, total, count) in values.items():
+            for bound, bucket_count in zip(self.buckets, counts):
+                labels = _format_labels(self.label_names, key, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{labels} {bucket_count}")
+            labels = _format_labels(self.label_names, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+REGISTRY = []
+_collectors = []
+
+def _is_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def _archive_dead_processes(directory: Path, dead: list = None) -> None:
+    """Fold the files of exited processes into archive.db and delete them.
+
+    Counters and histograms keep their totals and non-live gauges their
+    combined value, so restarting a worker does not reset them.
+    """
+    import fcntl
+
+    metrics = {metric.name: metric for metric in REGISTRY}
+    with open(directory / "archive.lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if dead is None:
+            dead = [path for path in directory.glob("*.db")
+                    if path.stem.isdigit() and not _is_alive(int(path.stem))]
+        dead = [path for path in dead if path.exists()]
+        if not dead:
+            return
+        archive = _ValueFile(directory / "archive.db")
+        merged = _ValueFile.read(directory / "archive.db")
+        for path in dead:
+            for key, value in _ValueFile.read(path).items():
+                metric = metrics.get(key[0])
+                if metric is None:
+                    continue
+                mode = getattr(metric, "mode", "sum")
+                if mode.startswith("live"):
+                    continue
+                if key in merged and mode in ("max", "min"):
+                    value = (max if mode == "max" else min)(merged[key], value)
+                elif mode not in ("max", "min"):
+                    value += merged.get(key, 0)
+                merged[key] = value
+                archive.write(key, value)
+            path.unlink()
+
+def _render_multiprocess(directory: Path) -> list:
+    _archive_dead_processes(directory)
+    merged = {metric.name: {} for metric in REGISTRY}
+    metrics = {metric.name: metric for metric in REGISTRY}
+    for path in sorted(directory.glob("*.db")):
+        samples = {}
+        for key, value in _ValueFile.read(path).items():
+            samples.setdefault(key[0], {})[key[1:]] = value
+        for name, metric_samples in samples.items():
+            if name in metrics:
+                metrics[name]._merge(merged[name], metric_samples, path.stem)
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render(merged[metric.name]))
+    return lines
+
+def render_metrics() -> str:
+    for collect in _collectors:
+        collect()
+    if _values_file() is not None:
+        lines = _render_multiprocess(Path(METRICS_DIR))
+    else:
+        lines = []
+        for metric in REGISTRY:
+            lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+# HTTP
+http_requests = Counter("http_requests_total", "HTTP requests handled", ["method", "route", "status"])
+http_request_duration = Histogram("http_request_duration_seconds", "HTTP request latency", ["method", "route"])
+http_requests_in_flight = Gauge(
+    "http_requests_in_flight", "HTTP requests currently being served", ["method"], mode="livesum"
+)
+
+# Database
+db_queries = Counter("db_queries_total", "SQL statements executed", ["route"])
+db_query_duration = Histogram("db_query_duration_seconds", "SQL statement latency", ["route"])
+db_queries_per_request = Histogram(
+    "http_request_db_queries", "SQL statements per HTTP request", ["route"], buckets=COUNT_BUCKETS
+)
+db_time_per_request = Histogram("http_request_db_seconds", "Time spent in SQL per HTTP request", ["route"])
+db_pool_connections = Gauge("db_pool_connections", "Connection pool usage", ["engine", "state"], mode="livesum")
+
+# Forecasting
+model_operation_duration = Histogram(
+    "model_operation_duration_seconds", "Model load and predict latency", ["operation", "engine"]
+)
+model_training_duration = Histogram(
+    "model_training_duration_seconds", "Model tuning and training time", ["stage", "engine"],
+    buckets=TRAINING_BUCKETS
+)
+model_training_last_duration = Gauge(
+    "model_training_last_duration_seconds", "Duration of the latest tuning/training run per series",
+    ["region", "medicine", "stage"], mode="liveall"
+)
+
+class _RequestStats:
+    __slots__ = ("scope", "queries", "seconds")
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.queries = 0
+        self.seconds = 0.0
+
+    @property
+    def route(self) -> str:
+        # The router stores the matched route in the shared scope before the endpoint runs
+        return getattr(self.scope.get("route"), "path", "unmatched")
+
+# Mutable holder so queries run in the threadpool are counted on the request
+_request_stats = ContextVar("request_stats", default=None)
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    stats = _request_stats.get()
+    route = stats.route if stats is not None else "background"
+    db_queries.inc(route=route)
+    db_query_duration.observe(elapsed, route=route)
+    if stats is not None:
+        stats.queries += 1
+        stats.seconds += elapsed
+
+def instrument_pool(db_engine, name: str = "main"):
+    """Report ``db_engine``'s pool usage on every scrape.
+
+    In multiprocess mode a scrape only runs this process's collector, so the
+    gauges are also refreshed on every checkout and checkin.
+    """
+    def collect(*args):
+        pool = db_engine.pool
+        for state in ("size", "checkedin", "checkedout", "overflow"):
+            if hasattr(pool, state):
+                db_pool_connections.set(getattr(pool, state)(), engine=name, state=state)
+    _collectors.append(collect)
+    if METRICS_DIR:
+        event.listen(db_engine, "checkout", collect)
+        event.listen(db_engine, "checkin", collect)
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, status, in-flight and SQL usage per route."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        stats = _RequestStats(scope)
+        token = _request_stats.set(stats)
+        status = {"code": 500}
+        start = time.perf_counter()
+        http_requests_in_flight.inc(method=method)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = stats.route
+            elapsed = time.perf_counter() - start
+            http_requests_in_flight.dec(method=method)
+            http_requests.inc(method=method, route=route, status=status["code"])
+            http_request_duration.observe(elapsed, method=method, route=route)
+            db_queries_per_request.observe(stats.queries, route=route)
+            db_time_per_request.observe(stats.seconds, route=route)
+            _request_stats.reset(token)
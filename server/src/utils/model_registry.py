@@ -0,0 +1,222 @@
+from pathlib import Path
+from datetime import datetime
+from typing import Optional, Tuple
+import hashlib
+import io
+import json
+import logging
+import os
+import tempfile
+import threading
+
+logger = logging.getLogger(__name__)
+
+MODEL_REGISTRY_KEEP = int(os.getenv("MODEL_REGISTRY_KEEP", "5"))
+CURRENT_FILE = "CURRENT"
+
+def _atomic_write(path: Path, data: bytes):
+    """Write ``data`` to a temporary file and rename it over ``path``."""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+def data_fingerprint(df) -> str:
+    """Stable hash of a training frame's contents."""
+    import pandas as pd
+    return hashlib.sha256(pd.util.hash_pandas_object(df, index=False).values.tobytes()).hexdigest()
+
+class ModelRegistry:
+    """Versioned, content-addressed model artifacts with an atomic current pointer.
+
+    Layout per series under ``{model_dir}/registry/{region}/{medicine}/``:
+    ``artifacts/{sha256}.pkl`` holds immutable joblib dumps, ``versions/{version}.json``
+    their metadata, and ``CURRENT`` names the served version. ``CURRENT`` is
+    replaced with a rename, so readers in other processes see either the old
+    or the new version, never a partial file. ``load`` re-reads the pointer
+    only when the file is replaced and keeps one loaded model per series.
+    """
+
+    def __init__(self, model_dir: Path, keep: int = MODEL_REGISTRY_KEEP):
+        self.model_dir = Path(model_dir)
+        self.root = self.model_dir / "registry"
+        self.keep = keep
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def _series_dir(self, region: str, medicine: str) -> Path:
+        return self.root / region / medicine.lower()
+
+    def _legacy_path(self, region: str, medicine: str) -> Path:
+        return self.model_dir / f"{region}_{medicine.lower()}_model.pkl"
+
+    def current(self, region: str, medicine: str) -> Optional[dict]:
+        """The current pointer: ``{"version", "promoted_at"}``, or None."""
+        try:
+            return json.loads((self._series_dir(region, medicine) / CURRENT_FILE).read_text())
+        except FileNotFoundError:
+            return None
+
+    def versions(self, region: str, medicine: str) -> list:
+        """Metadata of the retained versions, newest first."""
+        version_dir = self._series_dir(region, medicine) / "versions"
+        if not version_dir.exists():
+            return []
+        return [json.loads(path.read_text()) for path in sorted(version_dir.glob("*.json"), reverse=True)]
+
+    def exists(self, region: str, medicine: str) -> bool:
+        return self.current(region, medicine) is not None or self._legacy_path(region, medicine).exists()
+
+    def publish(self, model, region: str, medicine: str, metadata: Optional[dict] = None) -> dict:
+        """Store ``model`` as a new version and make it current."""
+        import joblib
+
+        buffer = io.BytesIO()
+        joblib.dump(model, buffer)
+        payload = buffer.getvalue()
+        digest = hashlib.sha256(payload).hexdigest()
+
+        series_dir = self._series_dir(region, medicine)
+        (series_dir / "artifacts").mkdir(parents=True, exist_ok=True)
+        (series_dir / "versions").mkdir(parents=True, exist_ok=True)
+        artifact = series_dir / "artifacts" / f"{digest}.pkl"
+        if not artifact.exists():
+            _atomic_write(artifact, payload)
+
+        trained_at = datetime.utcnow()
+        record = {
+            "version": f"{trained_at:%Y%m%dT%H%M%S%f}-{digest[:12]}",
+            "region": region,
+            "medicine": medicine.lower(),
+            "artifact": digest,
+            "size_bytes": len(payload),
+            "engine": getattr(model, "engine", "prophet"),
+            "trained_at": trained_at.isoformat(),
+            **(metadata or {}),
+        }
+        _atomic_write(series_dir / "versions" / f"{record['version']}.json",
+                      json.dumps(record, indent=2, default=str).encode())
+        self.promote(region, medicine, record["version"])
+        self.prune(region, medicine)
+        logger.info(f"Published model {record['version']} for {medicine} in {region}")
+        return record
+
+    def promote(self, region: str, medicine: str, version: str) -> dict:
+        """Atomically point CURRENT at an existing ``version``."""
+        series_dir = self._series_dir(region, medicine)
+        if not (series_dir / "versions" / f"{version}.json").exists():
+            raise KeyError(f"Model version {version} not found for {medicine} in {region}")
+        pointer = {"version": version, "promoted_at": datetime.utcnow().isoformat()}
+        _atomic_write(series_dir / CURRENT_FILE, json.dumps(pointer).encode())
+        return pointer
+
+    def rollback(self, region: str, medicine: str, version: Optional[str] = None) -> dict:
+        """Make ``version`` current, by default the one published before the current version."""
+        if version is None:
+            current = self.current(region, medicine)
+            older = [v["version"] for v in self.versions(region, medicine)
+                     if current is None or v["version"] < current["version"]]
+            if not older:
+                raise KeyError(f"No earlier model version to roll back to for {medicine} in {region}")
+            version = older[0]
+        logger.info(f"Rolling back {medicine} in {region} to model {version}")
+        return self.promote(region, medicine, version)
+
+    def prune(self, region: str, medicine: str):
+        """Drop versions beyond the newest ``keep`` (never the current one) and orphaned artifacts."""
+        series_dir = self._series_dir(region, medicine)
+        current = (self.current(region, medicine) or {}).get("version")
+        retained = self.versions(region, medicine)
+        for record in retained[self.keep:]:
+            if record["version"] != current:
+                (series_dir / "versions" / f"{record['version']}.json").unlink(missing_ok=True)
+        referenced = {record["artifact"] for record in self.versions(region, medicine)}
+        for artifact in (series_dir / "artifacts").glob("*.pkl"):
+            if artifact.stem not in referenced:
+                artifact.unlink(missing_ok=True)
+
+    def load(self, region: str, medicine: str) -> Tuple[object, dict]:
+        """Return ``(model, metadata)`` of the current version, reloading only when it changes.
+
+        Falls back to a pre-registry ``{region}_{medicine}_model.pkl`` file.
+        Raises FileNotFoundError when neither exists.
+        """
+        import joblib
+
+        key = (region, medicine.lower())
+        series_dir = self._series_dir(region, medicine)
+        pointer_path = series_dir / CURRENT_FILE
+        legacy = None
+        try:
+            info = pointer_path.stat()
+        except FileNotFoundError:
+            legacy = self._legacy_path(region, medicine)
+            info = legacy.stat()  # FileNotFoundError if there is no model at all
+        # Every swap renames a new file into place, so the inode changes even
+        # when two swaps land within the filesystem's mtime resolution
+        stamp = (legacy is not None, info.st_ino, info.st_mtime_ns)
+
+        with self._lock:
+            cached = self._cache.get(key)
+        if cached is not None and cached[0] == stamp:
+            return cached[1], cached[2]
+
+        if legacy is not None:
+            metadata = {"version": "legacy", "engine": None}
+            model = joblib.load(legacy)
+        else:
+            version = json.loads(pointer_path.read_text())["version"]
+            metadata = json.loads((series_dir / "versions" / f"{version}.json").read_text())
+            if cached is not None and cached[2].get("artifact") == metadata["artifact"]:
+                # Same content under a new pointer (e.g. retrained on unchanged data)
+                model = cached[1]
+            else:
+                model = joblib.load(series_dir / "artifacts" / f"{metadata['artifact']}.pkl")
+                logger.info(f"Loaded model {version} for {medicine} in {region}")
+
+        with self._lock:
+            self._cache[key] = (stamp, model, metadata)
+        return model, metadata
+
+def import_legacy_models(model_dir: Path, registry: Optional[ModelRegistry] = None) -> int:
+    """Publish every ``{region}_{medicine}_model.pkl`` in ``model_dir`` into the registry."""
+    import joblib
+
+    registry = registry or ModelRegistry(model_dir)
+    count = 0
+    for path in sorted(Path(model_dir).glob("*_model.pkl")):
+        region, medicine = path.name[:-len("_model.pkl")].split("_", 1)
+        metadata = {"imported_from": path.name}
+        metadata_path = path.with_name(f"{region}_{medicine}_metadata.json")
+        if metadata_path.exists():
+            metadata["legacy_metadata"] = json.loads(metadata_path.read_text())
+        registry.publish(joblib.load(path), region, medicine, metadata)
+        count += 1
+    return count
+
+if __name__ == "__main__":
+    import sys
+    commands = {"import", "list", "rollback"}
+    if len(sys.argv) < 3 or sys.argv[1] not in commands:
+        print("Usage: python -m src.utils.model_registry import <model_dir>")
+        print("       python -m src.utils.model_registry list <model_dir> <region> <medicine>")
+        print("       python -m src.utils.model_registry rollback <model_dir> <region> <medicine> [version]")
+        sys.exit(1)
+    command, model_dir = sys.argv[1], Path(sys.argv[2])
+    if command == "import":
+        print(f"Imported {import_legacy_models(model_dir)} models into {model_dir / 'registry'}")
+    elif command == "list":
+        registry = ModelRegistry(model_dir)
+        current = (registry.current(sys.argv[3], sys.argv[4]) or {}).get("version")
+        for record in registry.versions(sys.argv[3], sys.argv[4]):
+            marker = "*" if record["version"] == current else " "
+            print(f"{marker} {record['version']}  {record['engine']}  trained {record['trained_at']}")
+    else:
+        pointer = ModelRegistry(model_dir).rollback(sys.argv[3], sys.argv[4], sys.argv[5] if len(sys.argv) > 5 else None)
+        print(f"Current model is now {pointer['version']}")
@@ -1,22 +1,114 @@
 import pandas as pd
 import numpy as np
-from prophet import Prophet
-from prophet.diagnostics import cross_validation, performance_metrics
-import joblib
 from pathlib import Path
 import logging
 from datetime import datetime
+from typing import Dict, Iterator, Optional, Tuple
+from contextlib import contextmanager
 import json
+import os
+import time
+from sqlalchemy import func, select
+
+from .metrics import model_training_duration, model_training_last_duration
+from .model_registry import ModelRegistry, data_fingerprint
+from .intervals import fit_residual_intervals
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+FORECAST_ENGINE = os.getenv("FORECAST_ENGINE", "prophet")
+TRAINING_MEMORY_BUDGET_MB = int(os.getenv("TRAINING_MEMORY_BUDGET_MB", "256"))
+
+class UsageHistorySource:
+    """Training series for one region, read from usage_history a batch at a time.
+
+    A first query counts the days of every series; medicines are then read
+    in name ranges that fit in ``memory_budget_mb``, each on its own short
+    connection, so no cursor or transaction is held open while the batch is
+    fitted. Series are grouped into ``ds``/``y`` frames in memory, so nothing
+    is read from or written to disk.
+    """
+
+    ROW_BYTES = 100  # rough cost of one fetched row before it is packed into arrays
+
+    def __init__(self, db_engine, medicines: Optional[list] = None,
+                 memory_budget_mb: int = TRAINING_MEMORY_BUDGET_MB):
+        self.engine = db_engine
+        # Names, not ids: each regional database numbers its medicines itself
+        self.medicines = medicines
+        self.budget_rows = max(1000, memory_budget_mb * 1024 * 1024 // self.ROW_BYTES)
+
+    def _select(self, *columns):
+        # Imported here so the trainers work without a configured database
+        from ..models import Medicine, UsageHistory
+
+        stmt = (
+            select(*columns)
+            .select_from(UsageHistory)
+            .join(Medicine, Medicine.medicine_id == UsageHistory.medicine_id)
+            .group_by(Medicine.name)
+            .order_by(Medicine.name)
+        )
+        if self.medicines is not None:
+            stmt = stmt.where(Medicine.name.in_(self.medicines))
+        return stmt
+
+    def _pages(self) -> list:
+        """``(first, last)`` name ranges whose series fit in the budget together"""
+        from ..models import Medicine, UsageHistory
+
+        with self.engine.connect() as conn:
+            counts = conn.execute(self._select(
+                Medicine.name, func.count(func.distinct(UsageHistory.date))
+            )).all()
+        pages, rows = [], 0
+        for name, days in counts:
+            if pages and rows + days <= self.budget_rows:
+                pages[-1][1] = name
+                rows += days
+            else:
+                pages.append([name, name])
+                rows = days
+        return pages
+
+    def iter_batches(self) -> Iterator[Dict[str, pd.DataFrame]]:
+        """Yield ``{medicine_name: df}`` groups that fit in the memory budget"""
+        from ..models import Medicine, UsageHistory
+
+        for first, last in self._pages():
+            stmt = self._select(Medicine.name, UsageHistory.date, func.sum(UsageHistory.quantity_used))
+            stmt = stmt.where(Medicine.name.between(first, last))
+            stmt = stmt.group_by(UsageHistory.date).order_by(UsageHistory.date)
+            with self.engine.connect() as conn:
+                rows = conn.execute(stmt).all()
+            if rows:
+                yield self._frames(rows)
+
+    def iter_series(self) -> Iterator[Tuple[str, pd.DataFrame]]:
+        """Yield ``(medicine_name, df)`` for every medicine with usage history"""
+        for batch in self.iter_batches():
+            yield from batch.items()
+
+    @staticmethod
+    def _frames(rows: list) -> Dict[str, pd.DataFrame]:
+        names, dates, values = (np.asarray(col) for col in zip(*rows))
+        starts = np.concatenate([[0], np.flatnonzero(names[1:] != names[:-1]) + 1, [len(names)]])
+        return {
+            str(names[lo]): pd.DataFrame({
+                "ds": pd.to_datetime(dates[lo:hi]),
+                "y": values[lo:hi].astype(float),
+            })
+            for lo, hi in zip(starts[:-1], starts[1:])
+        }
+
 class ModelTrainer:
     def __init__(self, data_dir: Path, model_dir: Path):
         self.data_dir = data_dir
         self.model_dir = model_dir
         self.model_dir.mkdir(parents=True, exist_ok=True)
+        self.registry = ModelRegistry(model_dir)
         
     def load_data(self, region: str, medicine: str) -> pd.DataFrame:
         """Load and prepare data for Prophet"""
@@ -27,6 +119,9 @@ class ModelTrainer:
     
     def tune_hyperparameters(self, df: pd.DataFrame) -> dict:
         """Tune Prophet hyperparameters using grid search"""
+        from prophet import Prophet
+        from prophet.diagnostics import cross_validation, performance_metrics
+        
         param_grid = {
             'changepoint_prior_scale': [0.001, 0.01, 0.05, 0.1, 0.5],
             'seasonality_prior_scale': [0.01, 0.1, 1.0, 10.0],
@@ -71,56 +166,118 @@ class ModelTrainer:
         
         return best_params
     
-    def train_model(self, df: pd.DataFrame, params: dict) -> Prophet:
+    def train_model(self, df: pd.DataFrame, params: dict) -> "Prophet":
         """Train Prophet model with given parameters"""
+        from prophet import Prophet
+        
         model = Prophet(**params)
         model.fit(df)
+        # Residual quantiles for the fast "residual" interval mode
+        fit_residual_intervals(model)
         return model
     
-    def save_model(self, model: Prophet, region: str, medicine: str):
-        """Save trained model and metadata"""
-        model_path = self.model_dir / f"{region}_{medicine.lower()}_model.pkl"
-        metadata_path = self.model_dir / f"{region}_{medicine.lower()}_metadata.json"
-        
-        # Save model
-        joblib.dump(model, model_path)
-        
-        # Save metadata
-        metadata = {
-            'trained_at': datetime.now().isoformat(),
-            'parameters': model.params
-        }
-        with open(metadata_path, 'w') as f:
-            json.dump(metadata, f)
-            
-        logger.info(f"Model saved: {model_path}")
+    def save_model(
+        self,
+        model: "Prophet",
+        region: str,
+        medicine: str,
+        params: Optional[dict] = None,
+        df: Optional[pd.DataFrame] = None,
+        metrics: Optional[dict] = None
+    ) -> dict:
+        """Publish the trained model as a new registry version with its metadata"""
+        metadata = {'parameters': params or {}}
+        if df is not None:
+            metadata['data'] = {
+                'fingerprint': data_fingerprint(df[['ds', 'y']]),
+                'rows': len(df),
+                'start': df['ds'].min().isoformat(),
+                'end': df['ds'].max().isoformat()
+            }
+        if metrics:
+            metadata['metrics'] = metrics
+        return self.registry.publish(model, region, medicine, metadata)
+
+@contextmanager
+def _timed(stage: str, engine: str, region: str, medicine: str):
+    start = time.perf_counter()
+    yield
+    elapsed = time.perf_counter() - start
+    model_training_duration.observe(elapsed, stage=stage, engine=engine)
+    model_training_last_duration.set(elapsed, region=region, medicine=medicine, stage=stage)
+
+def train_series(trainer: ModelTrainer, df: pd.DataFrame, region: str, medicine: str, tune: bool = True):
+    """Tune, train and save the model of one series"""
+    best_params = {}
+    if tune:
+        with _timed("tune", "prophet", region, medicine):
+            best_params = trainer.tune_hyperparameters(df)
+    with _timed("train", "prophet", region, medicine):
+        model = trainer.train_model(df, best_params)
+    trainer.save_model(model, region, medicine, params=best_params, df=df,
+                       metrics={'residual_intervals': model.residual_intervals})
+    logger.info(f"Successfully trained model for {medicine} in {region}")
+
+def train_all_models(
+    regions: Optional[list] = None,
+    medicine_ids: Optional[list] = None,
+    engine: str = FORECAST_ENGINE,
+    tune: bool = True
+):
+    """Retrain models for every medicine in the given regions.
+
+    Each region's usage history is read in batches that fit in
+    TRAINING_MEMORY_BUDGET_MB, and no connection is held while fitting.
+    Regions without a database of their own are skipped: the main database's
+    usage history has no region, so every region would get the same model.
+    """
+    from ..database import REGION_DATABASE_URLS, engine as main_engine, get_region_engine
+    from ..models import Medicine
+
+    model_dir = Path("models")
+    medicines = None
+    if medicine_ids:
+        with main_engine.connect() as conn:
+            medicines = list(conn.execute(
+                select(Medicine.name).where(Medicine.medicine_id.in_(medicine_ids))
+            ).scalars())
+    for region in regions or list(REGION_DATABASE_URLS):
+        if not REGION_DATABASE_URLS.get(region):
+            logger.warning(f"Skipping {region}: {region.upper()}_DATABASE_URL is not set")
+            continue
+        db_engine = get_region_engine(region)
+        source = UsageHistorySource(db_engine, medicines)
+
+        if engine == "global":
+            from .global_model import GlobalModelTrainer, load_region_events
+            with db_engine.connect() as conn:
+                events = load_region_events(conn, region)
+            trainer = GlobalModelTrainer(data_dir=Path("dataset/data"), model_dir=model_dir,
+                                         events={region: events})
+            for frames in source.iter_batches():
+                # One fit covers the whole batch, so durations are per region
+                params = None
+                if tune:
+                    with _timed("tune", "global", region, "*"):
+                        params = trainer.tune_batch({region: frames})
+                with _timed("train", "global", region, "*"):
+                    models = trainer.train_batch({region: frames}, params)
+                for (_, medicine), model in models.items():
+                    trainer.save_model(model, region, medicine, params=model.params, df=frames[medicine],
+                                       metrics={'residual_sigma': model.sigma})
+            continue
+
+        trainer = ModelTrainer(data_dir=Path("dataset/data"), model_dir=model_dir)
+        for medicine, df in source.iter_series():
+            try:
+                train_series(trainer, df, region, medicine, tune)
+            except Exception as e:
+                logger.error(f"Error training model for {medicine} in {region}: {str(e)}")
 
 def train_models(medicine_id: int, region: str):
     """Main function to train models for a specific medicine and region"""
     try:
-        trainer = ModelTrainer(
-            data_dir=Path("dataset/data"),
-            model_dir=Path("models")
-        )
-        
-        # Get medicine name from database
-        # This should be implemented based on your database structure
-        medicine_name = get_medicine_name(medicine_id)
-        
-        # Load and prepare data
-        df = trainer.load_data(region, medicine_name)
-        
-        # Tune hyperparameters
-        best_params = trainer.tune_hyperparameters(df)
-        
-        # Train final model
-        model = trainer.train_model(df, best_params)
-        
-        # Save model and metadata
-        trainer.save_model(model, region, medicine_name)
-        
-        logger.info(f"Successfully trained model for {medicine_name} in {region}")
-        
+        train_all_models(regions=[region], medicine_ids=[medicine_id])
     except Exception as e:
         logger.error(f"Error training model: {str(e)}")
         raise
@@ -0,0 +1,273 @@
+import logging
+import os
+import re
+from datetime import date, datetime
+from typing import List, Optional
+
+from sqlalchemy import text
+
+from ..database import REGION_DATABASE_URLS, engine, get_region_engine
+
+logger = logging.getLogger(__name__)
+
+# Monthly range partitions on PostgreSQL. Other dialects (SQLite in
+# development) keep plain tables and every function here is a no-op.
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "4"))
+# Months of partitions kept before the current one; 0 keeps everything.
+# Usage history is the training data, so it is kept unless configured.
+PREDICTIONS_RETENTION_MONTHS = int(os.getenv("PREDICTIONS_RETENTION_MONTHS", "12"))
+USAGE_HISTORY_RETENTION_MONTHS = int(os.getenv("USAGE_HISTORY_RETENTION_MONTHS", "0"))
+# drop: detach then drop expired partitions; detach: leave them as standalone tables for archiving
+PARTITION_RETENTION_ACTION = os.getenv("PARTITION_RETENTION_ACTION", "drop")
+
+PARTITIONED_TABLES = {
+    "predictions": {
+        "column": "date",
+        "index": ("medicine_id", "region", "date"),
+        "retention_months": PREDICTIONS_RETENTION_MONTHS,
+    },
+    "usage_history": {
+        "column": "date",
+        "index": ("medicine_id", "date"),
+        "retention_months": USAGE_HISTORY_RETENTION_MONTHS,
+    },
+}
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month.year:04d}{month.month:02d}"
+
+def _month_of(table: str, name: str) -> Optional[date]:
+    match = re.fullmatch(rf"{re.escape(table)}_p(\d{{4}})(\d{{2}})", name)
+    return date(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+def is_partitioned(conn, table: str) -> bool:
+    if conn.dialect.name != "postgresql":
+        return False
+    return conn.execute(text(
+        "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = :table AND pg_table_is_visible(c.oid)"
+    ), {"table": table}).first() is not None
+
+def list_partitions(conn, table: str) -> List[str]:
+    return list(conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :table AND pg_table_is_visible(p.oid) ORDER BY c.relname"
+    ), {"table": table}).scalars())
+
+def create_partition(conn, table: str, month: date, existing: Optional[set] = None) -> bool:
+    """Create the partition for ``month`` unless it exists.
+
+    Rows that landed in the default partition for that month are moved into
+    the new partition (PostgreSQL refuses to create it otherwise).
+    """
+    name = partition_name(table, month)
+    existing = set(list_partitions(conn, table)) if existing is None else existing
+    if name in existing:
+        return False
+    column = PARTITIONED_TABLES[table]["column"]
+    default = f"{table}_default"
+    bounds = {"lower": month, "upper": add_months(month, 1)}
+    in_range = f"{column} >= :lower AND {column} < :upper"
+    stranded = default in existing and conn.execute(
+        text(f"SELECT 1 FROM {default} WHERE {in_range} LIMIT 1"), bounds
+    ).first() is not None
+
+    if stranded:
+        conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {default}"))
+    conn.execute(text(
+        f"CREATE TABLE {name} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{bounds['lower']}') TO ('{bounds['upper']}')"
+    ))
+    if stranded:
+        moved = conn.execute(text(f"INSERT INTO {name} SELECT * FROM {default} WHERE {in_range}"), bounds).rowcount
+        conn.execute(text(f"DELETE FROM {default} WHERE {in_range}"), bounds)
+        conn.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {default} DEFAULT"))
+        logger.warning(f"Moved {moved} rows of {table} from the default partition into {name}")
+    existing.add(name)
+    return True
+
+def ensure_partitions(conn, table: str, months_ahead: int = PARTITION_MONTHS_AHEAD,
+                      start: Optional[date] = None, today: Optional[date] = None) -> List[str]:
+    """Create monthly partitions from ``start`` (default: this month) to ``months_ahead`` months out."""
+    if not is_partitioned(conn, table):
+        return []
+    current = (today or date.today()).replace(day=1)
+    start = start.date() if isinstance(start, datetime) else start
+    month = (start or current).replace(day=1)
+    existing = set(list_partitions(conn, table))
+    if f"{table}_default" not in existing:
+        # Catches rows outside the created range instead of failing the insert
+        conn.execute(text(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT"))
+        existing.add(f"{table}_default")
+    created = []
+    while month <= add_months(current, months_ahead):
+        if create_partition(conn, table, month, existing):
+            created.append(partition_name(table, month))
+        month = add_months(month, 1)
+    return created
+
+def apply_retention(conn, table: str, keep_months: int, action: str = PARTITION_RETENTION_ACTION,
+                    today: Optional[date] = None) -> List[str]:
+    """Detach (and drop) partitions that ended more than ``keep_months`` months ago.
+
+    Removing a partition is a catalogue change, unlike a DELETE that would
+    rewrite and vacuum every expired row.
+    """
+    if keep_months <= 0 or not is_partitioned(conn, table):
+        return []
+    if action not in ("drop", "detach"):
+        raise ValueError("retention action must be drop or detach")
+    cutoff = add_months((today or date.today()).replace(day=1), -keep_months)
+    expired = []
+    for name in list_partitions(conn, table):
+        month = _month_of(table, name)
+        if month is None or month >= cutoff:
+            continue
+        conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+        if action == "drop":
+            conn.execute(text(f"DROP TABLE {name}"))
+        expired.append(name)
+    return expired
+
+def maintain_partitions(db_engine, tables: Optional[List[str]] = None, today: Optional[date] = None) -> dict:
+    """Create upcoming partitions and expire old ones for every partitioned table of a database."""
+    if db_engine.dialect.name != "postgresql":
+        return {}
+    summary = {}
+    for table in tables or PARTITIONED_TABLES:
+        config = PARTITIONED_TABLES[table]
+        # One transaction per table so a lock on one does not hold up the other
+        with db_engine.begin() as conn:
+            created = ensure_partitions(conn, table, today=today)
+            expired = apply_retention(conn, table, config["retention_months"], today=today)
+        if created or expired:
+            logger.info(f"{table} on {db_engine.url.database}: created {created}, expired {expired}")
+        summary[table] = {"created": created, "expired": expired}
+    return summary
+
+def maintain_all_databases(today: Optional[date] = None):
+    """Partition maintenance for the main database and every regional one."""
+    engines = {id(engine): engine}
+    for region in REGION_DATABASE_URLS:
+        region_engine = get_region_engine(region)
+        engines.setdefault(id(region_engine), region_engine)
+    for db_engine in engines.values():
+        try:
+            maintain_partitions(db_engine, today=today)
+        except Exception as e:
+            logger.error(f"Partition maintenance failed for {db_engine.url.database}: {str(e)}")
+
+def _serial_sequences(conn, table: str) -> List[tuple]:
+    return conn.execute(text(
+        "SELECT a.attname, pg_get_serial_sequence(:table, a.attname) FROM pg_attribute a "
+        "WHERE a.attrelid = CAST(:table AS regclass) AND a.attnum > 0 AND NOT a.attisdropped "
+        "AND pg_get_serial_sequence(:table, a.attname) IS NOT NULL"
+    ), {"table": table}).all()
+
+def _primary_key(conn, table: str) -> List[str]:
+    return list(conn.execute(text(
+        "SELECT a.attname FROM pg_index i "
+        "JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey) "
+        "WHERE i.indrelid = CAST(:table AS regclass) AND i.indisprimary ORDER BY a.attnum"
+    ), {"table": table}).scalars())
+
+def _foreign_keys(conn, table: str) -> List[tuple]:
+    return conn.execute(text(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = CAST(:table AS regclass) AND contype = 'f'"
+    ), {"table": table}).all()
+
+def _secondary_indexes(conn, table: str) -> List[tuple]:
+    """Indexes other than those backing the primary key or a constraint."""
+    return conn.execute(text(
+        "SELECT ci.relname, pg_get_indexdef(i.indexrelid), i.indisunique, "
+        "ARRAY(SELECT a.attname FROM pg_attribute a WHERE a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)) "
+        "FROM pg_index i JOIN pg_class ci ON ci.oid = i.indexrelid "
+        "WHERE i.indrelid = CAST(:table AS regclass) AND NOT i.indisprimary "
+        "AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid)"
+    ), {"table": table}).all()
+
+def _rebuild(conn, table: str, partitioned: bool, months_ahead: int):
+    """Copy ``table`` into a new (partitioned or plain) table of the same name.
+
+    Defaults, NOT NULL/CHECK constraints, foreign keys, secondary indexes
+    and serial sequences carry over. The partitioned primary key has to include the partition
+    column, so it becomes (id, date) and rows without a date are dropped;
+    converting back restores the single-column key.
+    """
+    column = PARTITIONED_TABLES[table]["column"]
+    old = f"{table}_rebuild"
+    primary_key = [name for name in _primary_key(conn, table) if name != column]
+    sequences = _serial_sequences(conn, table)
+    foreign_keys = _foreign_keys(conn, table)
+    # Definitions name the table, so they apply unchanged to its replacement
+    indexes = _secondary_indexes(conn, table)
+    conn.execute(text(f"ALTER TABLE {table} RENAME TO {old}"))
+
+    like = f"(LIKE {old} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING STORAGE)"
+    if partitioned:
+        conn.execute(text(f"CREATE TABLE {table} {like} PARTITION BY RANGE ({column})"))
+        conn.execute(text(f"ALTER TABLE {table} ALTER COLUMN {column} SET NOT NULL"))
+        start = conn.execute(text(f"SELECT min({column}) FROM {old}")).scalar()
+        ensure_partitions(conn, table, months_ahead, start=start)
+        copied = conn.execute(text(f"INSERT INTO {table} SELECT * FROM {old} WHERE {column} IS NOT NULL")).rowcount
+        primary_key.append(column)
+    else:
+        conn.execute(text(f"CREATE TABLE {table} {like}"))
+        copied = conn.execute(text(f"INSERT INTO {table} SELECT * FROM {old}")).rowcount
+
+    for name, sequence in sequences:
+        # Dropping the old table would otherwise drop the sequences it owns
+        conn.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {table}.{name}"))
+    conn.execute(text(f"DROP TABLE {old}"))
+    if primary_key:
+        conn.execute(text(f"ALTER TABLE {table} ADD PRIMARY KEY ({', '.join(primary_key)})"))
+    for name, definition in foreign_keys:
+        conn.execute(text(f"ALTER TABLE {table} ADD CONSTRAINT {name} {definition}"))
+    for name, definition, unique, columns in indexes:
+        # Indexes of a partitioned table are defined ON ONLY the parent
+        definition = definition.replace(" ON ONLY ", " ON ", 1)
+        if partitioned and unique and column not in columns:
+            # PostgreSQL requires the partition column in unique indexes
+            logger.warning(f"Index {name} on {table} is no longer unique after partitioning")
+            definition = definition.replace("CREATE UNIQUE INDEX", "CREATE INDEX", 1)
+        conn.execute(text(definition))
+    if partitioned:
+        index = PARTITIONED_TABLES[table]["index"]
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{table}_lookup ON {table} ({', '.join(index)})"))
+    logger.info(f"Rebuilt {table} as a {'partitioned' if partitioned else 'plain'} table with {copied} rows")
+
+def convert_to_partitioned(conn, table: str, months_ahead: int = PARTITION_MONTHS_AHEAD) -> bool:
+    """Turn a plain table into a monthly range-partitioned one; False if it already is (or not PostgreSQL)."""
+    if conn.dialect.name != "postgresql" or is_partitioned(conn, table):
+        return False
+    _rebuild(conn, table, True, months_ahead)
+    return True
+
+def convert_to_plain(conn, table: str) -> bool:
+    if not is_partitioned(conn, table):
+        return False
+    _rebuild(conn, table, False, 0)
+    return True
+
+if __name__ == "__main__":
+    import sys
+    commands = {"convert", "maintain"}
+    if len(sys.argv) < 2 or sys.argv[1] not in commands:
+        print("Usage: python -m src.utils.partitions convert <region> [table ...]")
+        print("       python -m src.utils.partitions maintain")
+        sys.exit(1)
+    if sys.argv[1] == "maintain":
+        maintain_all_databases()
+    else:
+        # Regional databases are not managed by Alembic; convert their tables here
+        region_engine = get_region_engine(sys.argv[2])
+        for table in sys.argv[3:] or ["usage_history"]:
+            with region_engine.begin() as conn:
+                converted = convert_to_partitioned(conn, table)
+            print(f"{table}: {'converted' if converted else 'already partitioned or not PostgreSQL'}")
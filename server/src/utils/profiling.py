@@ -0,0 +1,181 @@
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import parse_qs
+
+from jose import JWTError, jwt
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.concurrency import run_in_threadpool
+
+from .. import auth, models
+
+# Captures are written as <id>.folded (collapsed stacks for flamegraph.pl /
+# speedscope) plus <id>.json (timing and the SQL statements executed).
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", "profiles"))
+PROFILE_SLOW_MS = float(os.getenv("PROFILE_SLOW_MS", "0"))  # 0 disables slow-request capture
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5"))
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "100"))
+PROFILE_HEADER = b"x-profile"
+
+IDLE_FILES = ("threading.py", "selectors.py", "queue.py", "thread.py", "base_events.py")
+
+class _Capture:
+    __slots__ = ("stacks", "sql")
+
+    def __init__(self):
+        self.stacks = Counter()
+        self.sql = []
+
+_capture = ContextVar("profile_capture", default=None)
+
+class _Sampler:
+    """One background thread sampling every thread's stack while captures are active.
+
+    Samples go to every active capture; idle pool and event-loop threads are
+    skipped, but concurrent requests can still show up in each other's profile.
+    """
+
+    def __init__(self):
+        self._captures = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def register(self, capture: _Capture):
+        with self._lock:
+            self._captures.add(capture)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+
+    def unregister(self, capture: _Capture):
+        with self._lock:
+            self._captures.discard(capture)
+
+    def _run(self):
+        own = threading.get_ident()
+        interval = PROFILE_SAMPLE_INTERVAL_MS / 1000
+        while True:
+            time.sleep(interval)
+            with self._lock:
+                captures = list(self._captures)
+                if not captures:
+                    self._thread = None
+                    return
+            for ident, frame in sys._current_frames().items():
+                if ident == own or os.path.basename(frame.f_code.co_filename) in IDLE_FILES:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                key = ";".join(reversed(stack))
+                for capture in captures:
+                    capture.stacks[key] += 1
+
+_sampler = _Sampler()
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _capture.get() is not None:
+        conn.info["profile_start"] = time.perf_counter()
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    capture = _capture.get()
+    if capture is not None and "profile_start" in conn.info:
+        elapsed = time.perf_counter() - conn.info.pop("profile_start")
+        capture.sql.append({"statement": statement, "duration_ms": round(elapsed * 1000, 3)})
+
+def _is_admin(headers: dict) -> bool:
+    authorization = headers.get(b"authorization", b"").decode()
+    if not authorization.lower().startswith("bearer "):
+        return False
+    try:
+        payload = jwt.decode(authorization[7:], auth.SECRET_KEY, algorithms=[auth.ALGORITHM])
+    except JWTError:
+        return False
+    return payload.get("role") == models.UserRole.ADMIN.value
+
+def _profile_requested(scope) -> bool:
+    """Header ``X-Profile: 1`` or ``?profile=1``, honoured only for admin tokens."""
+    query = scope.get("query_string", b"")
+    headers = dict(scope["headers"])
+    requested = headers.get(PROFILE_HEADER) in (b"1", b"true")
+    if not requested and b"profile=" in query:
+        requested = parse_qs(query.decode()).get("profile", [""])[0] in ("1", "true")
+    return requested and _is_admin(headers)
+
+def _write_capture(capture_id: str, capture: _Capture, summary: dict):
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    folded = "\n".join(f"{stack} {count}" for stack, count in capture.stacks.most_common())
+    (PROFILE_DIR / f"{capture_id}.folded").write_text(folded + "\n")
+    (PROFILE_DIR / f"{capture_id}.json").write_text(json.dumps({**summary, "sql": capture.sql}, indent=2))
+
+    # Keep only the newest PROFILE_KEEP captures
+    captures = sorted(PROFILE_DIR.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+    for old in captures[PROFILE_KEEP:]:
+        old.unlink(missing_ok=True)
+        old.with_suffix(".folded").unlink(missing_ok=True)
+
+class ProfilingMiddleware:
+    """Profiles admin-flagged requests and captures any request slower than PROFILE_SLOW_MS.
+
+    With no flag and slow capture off the only cost is a header/query check.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        explicit = _profile_requested(scope)
+        if not explicit and PROFILE_SLOW_MS <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        slug = re.sub(r"[^A-Za-z0-9]+", "-", scope["path"]).strip("-") or "root"
+        capture_id = f"{datetime.now():%Y%m%dT%H%M%S%f}_{scope['method']}_{slug}"
+        capture = _Capture()
+        token = _capture.set(capture)
+        _sampler.register(capture)
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                if explicit:
+                    message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", capture_id.encode())]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            _sampler.unregister(capture)
+            _capture.reset(token)
+            if explicit or elapsed_ms >= PROFILE_SLOW_MS:
+                summary = {
+                    "id": capture_id,
+                    "reason": "requested" if explicit else "slow",
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "query": scope.get("query_string", b"").decode(),
+                    "status": status["code"],
+                    "elapsed_ms": round(elapsed_ms, 3),
+                    "samples": sum(capture.stacks.values()),
+                    "sample_interval_ms": PROFILE_SAMPLE_INTERVAL_MS,
+                }
+                await run_in_threadpool(_write_capture, capture_id, capture, summary)
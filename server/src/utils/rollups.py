@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta
+from itertools import groupby
+from math import sqrt
+from typing import Iterable, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..models import Prediction, PredictionRollup
+
+GRANULARITIES = ("day", "week", "month", "quarter")
+
+def period_of(day: datetime, granularity: str) -> Tuple[str, datetime]:
+    """Return the period label and start date containing ``day``."""
+    day = datetime(day.year, day.month, day.day)
+    if granularity == "week":
+        iso = day.isocalendar()
+        return f"{iso.year}-W{iso.week:02d}", day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return f"{day.year}-{day.month:02d}", datetime(day.year, day.month, 1)
+    if granularity == "quarter":
+        quarter = (day.month - 1) // 3 + 1
+        return f"{day.year}-Q{quarter}", datetime(day.year, 3 * (quarter - 1) + 1, 1)
+    raise ValueError(f"Unsupported granularity: {granularity}")
+
+def build_rollups(medicine_id: int, region: str, predictions: Iterable[Prediction]) -> list:
+    """Aggregate daily predictions into week, month and quarter rollups.
+
+    Demand is summed. Daily interval widths are combined as the root of the
+    sum of squares, i.e. the width of a sum of independent daily errors;
+    adding the widths would overstate the uncertainty of a period total.
+    """
+    totals = {}
+    for pred in predictions:
+        for granularity in GRANULARITIES[1:]:
+            period, start = period_of(pred.date, granularity)
+            entry = totals.setdefault((granularity, period), [start, 0, 0.0, 0.0])
+            entry[1] += 1
+            entry[2] += pred.predicted_demand
+            entry[3] += pred.confidence_interval ** 2
+
+    return [
+        PredictionRollup(
+            medicine_id=medicine_id,
+            region=region,
+            granularity=granularity,
+            period=period,
+            period_start=start,
+            days=days,
+            predicted_demand=demand,
+            confidence_interval=sqrt(width_sq)
+        )
+        for (granularity, period), (start, days, demand, width_sq) in sorted(totals.items())
+    ]
+
+def materialize_rollups(db: Session, medicine_id: int, region: str, predictions: Iterable[Prediction]) -> list:
+    """Replace the stored rollups of one medicine/region. The caller commits."""
+    db.query(PredictionRollup).filter(
+        PredictionRollup.medicine_id == medicine_id,
+        PredictionRollup.region == region
+    ).delete(synchronize_session=False)
+    rollups = build_rollups(medicine_id, region, predictions)
+    db.add_all(rollups)
+    return rollups
+
+def refresh_rollups(db: Session, now: Optional[datetime] = None) -> int:
+    """Rebuild every rollup from the stored predictions still ahead of ``now``. The caller commits.
+
+    Matches the daily view, which only serves future predictions: elapsed
+    days drop out of the current period, and series whose forecast has
+    run out lose their rollups instead of serving them indefinitely.
+    """
+    now = now or datetime.now()
+    db.query(PredictionRollup).delete(synchronize_session=False)
+    rows = db.execute(
+        select(
+            Prediction.medicine_id,
+            Prediction.region,
+            Prediction.date,
+            Prediction.predicted_demand,
+            Prediction.confidence_interval
+        )
+        .where(Prediction.date >= now)
+        .order_by(Prediction.medicine_id, Prediction.region, Prediction.date)
+    )
+    count = 0
+    for (medicine_id, region), series in groupby(rows, key=lambda row: (row.medicine_id, row.region)):
+        rollups = build_rollups(medicine_id, region, series)
+        db.add_all(rollups)
+        count += len(rollups)
+    return count
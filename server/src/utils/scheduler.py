@@ -1,24 +1,24 @@
+from datetime import datetime
 from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.schedulers.base import STATE_STOPPED
 from apscheduler.triggers.cron import CronTrigger
-from .model_training import train_models
-from ..database import SessionLocal
-from ..models import Medicine
+from .leader import LeaderElection, worker_id
+
+_scheduler = None
+_election = None
 
 def setup_model_retraining_schedule():
+    """Register the retraining jobs; only the elected worker runs them."""
+    global _scheduler, _election
     scheduler = BackgroundScheduler()
     
     def retrain_all_models():
-        db = SessionLocal()
-        try:
-            medicines = db.query(Medicine).all()
-            regions = ['delhi', 'kolkata']
-            
-            for medicine in medicines:
-                for region in regions:
-                    train_models(medicine.id, region)
-                    
-        finally:
-            db.close()
+        # Imported here so the ML stack is only loaded when the job runs
+        from .forecasting import forecast_all
+        from .model_training import train_all_models
+        train_all_models()
+        # Store every series' new forecast and rollups
+        forecast_all()
     
     # Schedule retraining every Sunday at 2 AM
     scheduler.add_job(
@@ -28,4 +28,58 @@ def setup_model_retraining_schedule():
         name='Weekly model retraining'
     )
     
-    scheduler.start()
\ No newline at end of file
+    def maintain_partitions():
+        from .partitions import maintain_all_databases
+        maintain_all_databases()
+    
+    # Create next months' partitions and expire old ones daily at 3 AM; also
+    # once when this worker becomes leader, so a fresh deployment has them
+    scheduler.add_job(
+        maintain_partitions,
+        trigger=CronTrigger(hour=3),
+        id='partition_maintenance',
+        name='Daily partition maintenance'
+    )
+    
+    def refresh_rollups():
+        from ..database import SessionLocal
+        from .rollups import refresh_rollups as rebuild
+        db = SessionLocal()
+        try:
+            rebuild(db)
+            db.commit()
+        finally:
+            db.close()
+    
+    # Drop elapsed days and expired forecasts from the period totals shortly after midnight
+    scheduler.add_job(
+        refresh_rollups,
+        trigger=CronTrigger(hour=0, minute=15),
+        id='rollup_refresh',
+        name='Daily prediction rollup refresh'
+    )
+    
+    def on_elected():
+        if scheduler.state == STATE_STOPPED:
+            scheduler.start()
+        else:
+            scheduler.resume()
+        scheduler.modify_job('partition_maintenance', next_run_time=datetime.now(scheduler.timezone))
+    
+    _scheduler = scheduler
+    _election = LeaderElection("model_retraining", on_elected, on_lost=scheduler.pause)
+    _election.start()
+
+def get_scheduler_status() -> dict:
+    if _election is None:
+        return {"worker": worker_id(), "is_leader": False, "leader": None, "jobs": []}
+    status = _election.status()
+    status["jobs"] = [
+        {
+            "id": job.id,
+            "name": job.name,
+            "next_run_time": job.next_run_time.isoformat() if job.next_run_time else None
+        }
+        for job in _scheduler.get_jobs()
+    ] if _election.is_leader else []
+    return status
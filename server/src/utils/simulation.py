@@ -0,0 +1,267 @@
+import numpy as np
+import os
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+from multiprocessing import get_context
+from statistics import NormalDist
+from typing import Dict, List, Optional
+from sqlalchemy import func, select
+
+from ..database import engine, get_region_engine
+from ..models import Batch, Medicine, Prediction, UsageHistory
+
+logger = logging.getLogger(__name__)
+
+SIMULATION_WORKERS = int(os.getenv("SIMULATION_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Share of each day's forecast variance that persists across the whole
+# trajectory (forecast bias) rather than being independent day-to-day noise
+SIMULATION_PERSISTENCE = float(os.getenv("SIMULATION_PERSISTENCE", "0.5"))
+HISTORY_FALLBACK_DAYS = 28
+# Stored confidence_interval is the width of the 80% forecast interval
+INTERVAL_Z = NormalDist().inv_cdf(0.9)
+
+def surge_profile(surges: List[dict], region: str, horizon: int) -> np.ndarray:
+    """Daily demand multipliers with the ramp-up/cool-down shape of dataset/generate_data.py."""
+    profile = np.ones(horizon)
+    day = np.arange(horizon)
+    for surge in surges:
+        if surge.get("regions") and region not in surge["regions"]:
+            continue
+        start, days, multiplier = surge.get("start_day", 0), surge["days"], surge["multiplier"]
+        ramp = surge.get("ramp_days")
+        ramp = min(14, days // 4) if ramp is None else ramp
+        into, left = day - start, start + days - day
+        effect = np.where(
+            (into >= 0) & (left > 0),
+            np.minimum(1.0, np.minimum(into + 1, left) / max(ramp, 1)),
+            0.0
+        )
+        profile *= 1 + (multiplier - 1) * effect
+    return profile
+
+def load_region_inputs(region: str, horizon: int, medicine_ids: Optional[list] = None,
+                       today: Optional[date] = None) -> dict:
+    """Current stock, expiry schedule and forecast arrays for every medicine of a region.
+
+    Grouped queries: the medicine catalogue and stored forecasts from the
+    main database, unexpired batches from the region's database, and recent
+    usage for medicines without a forecast. Each regional database numbers
+    its medicines itself, so regional rows are matched by medicine name and
+    reported under the main database's id. Forecasts shorter than the
+    horizon are extended with their last week's average.
+    """
+    today = today or date.today()
+    start = datetime.combine(today, datetime.min.time())
+    end = start + timedelta(days=horizon)
+
+    catalogue_stmt = select(Medicine.medicine_id, Medicine.name)
+    batch_stmt = (
+        select(Medicine.name, Batch.expiry_date, func.sum(Batch.quantity))
+        .join(Medicine, Medicine.medicine_id == Batch.medicine_id)
+        .where(Batch.expiry_date >= start, Batch.quantity > 0)
+        .group_by(Medicine.name, Batch.expiry_date)
+    )
+    forecast_stmt = (
+        select(
+            Prediction.medicine_id,
+            Prediction.date,
+            func.avg(Prediction.predicted_demand),
+            func.avg(Prediction.confidence_interval)
+        )
+        .where(Prediction.region == region, Prediction.date >= start, Prediction.date < end)
+        .group_by(Prediction.medicine_id, Prediction.date)
+    )
+    if medicine_ids:
+        catalogue_stmt = catalogue_stmt.where(Medicine.medicine_id.in_(medicine_ids))
+        forecast_stmt = forecast_stmt.where(Prediction.medicine_id.in_(medicine_ids))
+
+    with engine.connect() as conn:
+        names = dict(conn.execute(catalogue_stmt).all())
+        forecasts = conn.execute(forecast_stmt).all()
+    main_ids = {name: medicine_id for medicine_id, name in names.items()}
+    if medicine_ids:
+        batch_stmt = batch_stmt.where(Medicine.name.in_(list(main_ids)))
+    region_engine = get_region_engine(region)
+    with region_engine.connect() as conn:
+        batches = [(main_ids[name], expiry, quantity)
+                   for name, expiry, quantity in conn.execute(batch_stmt).all() if name in main_ids]
+
+    # Medicines with a forecast but no stock are included: they are already out
+    ids = sorted({row[0] for row in batches} | {row[0] for row in forecasts})
+    index = {medicine_id: i for i, medicine_id in enumerate(ids)}
+    M = len(ids)
+
+    # expiry_floor[m, d]: stock (in FEFO order) that has expired by day d
+    added = np.zeros((M, horizon + 1))
+    total = np.zeros(M)
+    for medicine_id, expiry, quantity in batches:
+        m = index[medicine_id]
+        day = (expiry.date() if isinstance(expiry, datetime) else expiry) - today
+        added[m, min(max(day.days, 0), horizon)] += quantity
+        total[m] += quantity
+    # Batches are consumed earliest expiry first, so what expires by day d is
+    # the bottom of the stack: the cumulative quantity of all earlier expiries
+    expiry_floor = np.cumsum(added, axis=1)[:, :horizon]
+
+    mean = np.full((M, horizon), np.nan)
+    sd = np.full((M, horizon), np.nan)
+    for medicine_id, day, demand, interval in forecasts:
+        m = index.get(medicine_id)
+        d = ((day.date() if isinstance(day, datetime) else day) - today).days
+        if m is not None and 0 <= d < horizon:
+            mean[m, d] = demand
+            sd[m, d] = (interval or 0.0) / (2 * INTERVAL_Z)
+
+    sources = ["forecast" if not np.isnan(mean[m]).all() else "none" for m in range(M)]
+    missing = [names[ids[m]] for m in range(M) if sources[m] == "none" and ids[m] in names]
+    if missing:
+        since = today - timedelta(days=HISTORY_FALLBACK_DAYS)
+        usage_stmt = (
+            select(Medicine.name, UsageHistory.date, func.sum(UsageHistory.quantity_used))
+            .join(Medicine, Medicine.medicine_id == UsageHistory.medicine_id)
+            .where(Medicine.name.in_(missing), UsageHistory.date >= since)
+            .group_by(Medicine.name, UsageHistory.date)
+        )
+        with region_engine.connect() as conn:
+            usage = conn.execute(usage_stmt).all()
+        daily = {}
+        for name, _, quantity in usage:
+            daily.setdefault(main_ids[name], []).append(quantity)
+        for medicine_id, values in daily.items():
+            values = np.asarray(values, dtype=float)
+            mean[index[medicine_id]] = values.sum() / HISTORY_FALLBACK_DAYS
+            sd[index[medicine_id]] = values.std()
+            sources[index[medicine_id]] = "usage_history"
+
+    for m in range(M):
+        known = np.flatnonzero(~np.isnan(mean[m]))
+        if len(known) and known[-1] < horizon - 1:
+            tail = known[-7:]
+            mean[m, known[-1] + 1:] = mean[m, tail].mean()
+            sd[m, known[-1] + 1:] = sd[m, tail].mean()
+
+    return {
+        "region": region,
+        "medicine_ids": ids,
+        "total": total,
+        "expiry_floor": expiry_floor,
+        "mean": np.nan_to_num(mean),
+        "sd": np.nan_to_num(sd),
+        "demand_source": sources,
+    }
+
+def simulate_region(inputs: dict, surges: List[dict], trajectories: int, seed: Optional[int] = None,
+                    persistence: float = SIMULATION_PERSISTENCE) -> List[dict]:
+    """Run ``trajectories`` demand paths for every medicine of one region at once.
+
+    State is the FEFO stack pointer per (medicine, trajectory): each day it is
+    raised to the expiry floor (the difference is wasted stock), then demand
+    is served from the remaining stack. All arrays are (medicines, trajectories).
+    """
+    mean, sd = inputs["mean"], inputs["sd"]
+    M, horizon = mean.shape
+    if M == 0:
+        return []
+    rng = np.random.default_rng(seed)
+    persistence = min(max(persistence, 0.0), 0.99)
+    mean = (mean * surge_profile(surges, inputs["region"], horizon)).astype(np.float32)
+    relative = (sd / np.maximum(inputs["mean"], 1e-9)).astype(np.float32)
+    floor = inputs["expiry_floor"].astype(np.float32)
+    total = inputs["total"].astype(np.float32)[:, None]
+
+    # demand = mean + sd * (level + noise): the level is normal and fixed per
+    # trajectory; daily noise is uniform with unit variance, since uniform
+    # draws cost a quarter of normal ones and the sum over days is near-normal
+    # anyway. With u ~ U(0, 1): noise = sqrt(12) * (u - 0.5).
+    shape = (M, trajectories)
+    spread = np.float32(np.sqrt(12))
+    noise_scale = np.float32(np.sqrt(1 - persistence))
+    level = rng.standard_normal(shape, dtype=np.float32)
+    level *= np.float32(np.sqrt(persistence)) / (noise_scale * spread)
+    daily_sd = (mean * relative * noise_scale * spread).astype(np.float32)
+    offset = (mean - 0.5 * daily_sd).astype(np.float32)
+    used = np.zeros(shape, np.float32)
+    served_total = np.zeros(shape, np.float32)
+    demanded = np.zeros(shape, np.float32)
+    stock_days = np.zeros(shape, np.int32)
+    demand = np.empty(shape, np.float32)
+    served = np.empty(shape, np.float32)
+
+    # In-place arithmetic only: every temporary here would be a (M, trajectories) array
+    for d in range(horizon):
+        np.maximum(used, floor[:, d:d + 1], out=used)
+
+        rng.random(dtype=np.float32, out=demand)
+        demand += level
+        demand *= daily_sd[:, d:d + 1]
+        demand += offset[:, d:d + 1]
+        np.maximum(demand, 0, out=demand)
+        demanded += demand
+
+        np.subtract(total, used, out=served)
+        np.minimum(served, demand, out=served)
+        used += served
+        served_total += served
+        # Stock never comes back, so the days that end with stock on hand
+        # are exactly the days before the first shortage
+        stock_days += used < total
+
+    short = demanded - served_total
+    wasted = np.maximum(used - served_total, 0)
+    stocked_out = short > 1e-3 * np.maximum(demanded, 1)
+    days = np.sort(np.where(stocked_out, stock_days, horizon), axis=1)
+    results = []
+    for m, medicine_id in enumerate(inputs["medicine_ids"]):
+        p10, p50 = days[m, int(0.1 * (trajectories - 1))], days[m, int(0.5 * (trajectories - 1))]
+        results.append({
+            "medicine_id": medicine_id,
+            "region": inputs["region"],
+            "current_stock": float(total[m, 0]),
+            "demand_source": inputs["demand_source"][m],
+            "stockout_probability": float(stocked_out[m].mean()),
+            "days_to_stockout_p10": int(p10) if p10 < horizon else None,
+            "days_to_stockout_p50": int(p50) if p50 < horizon else None,
+            "expected_demand": float(demanded[m].mean()),
+            "expected_shortage": float(short[m].mean()),
+            "expected_expired": float(wasted[m].mean()),
+            "fill_rate": float(1 - short[m].sum() / max(demanded[m].sum(), 1e-9)),
+        })
+    return results
+
+_pool = None
+
+def _get_pool() -> ProcessPoolExecutor:
+    # Spawned, not forked: the API process has scheduler and profiler threads.
+    # Kept alive so later simulations skip worker start-up.
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=SIMULATION_WORKERS, mp_context=get_context("spawn"))
+    return _pool
+
+def run_scenario(
+    regions: List[str],
+    surges: List[dict],
+    horizon: int = 90,
+    trajectories: int = 2000,
+    medicine_ids: Optional[list] = None,
+    seed: Optional[int] = None,
+    inputs: Optional[Dict[str, dict]] = None
+) -> List[dict]:
+    """Simulate every region, one process per region when more than one is requested."""
+    started = time.perf_counter()
+    inputs = inputs or {region: load_region_inputs(region, horizon, medicine_ids) for region in regions}
+    seeds = np.random.SeedSequence(seed).spawn(len(regions))
+    jobs = [(inputs[region], surges, trajectories, int(s.generate_state(1)[0])) for region, s in zip(regions, seeds)]
+    if len(jobs) > 1 and SIMULATION_WORKERS > 1:
+        futures = [_get_pool().submit(simulate_region, *job) for job in jobs]
+        per_region = [future.result() for future in futures]
+    else:
+        per_region = [simulate_region(*job) for job in jobs]
+    results = [result for results in per_region for result in results]
+    logger.info(
+        f"Simulated {len(results)} medicines x {trajectories} trajectories over {horizon} days "
+        f"in {time.perf_counter() - started:.2f}s"
+    )
+    return results
@@ -0,0 +1,7 @@
+import os
+import sys
+from pathlib import Path
+
+# src.database needs a URL at import; tests build their own in-memory engines
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -0,0 +1,50 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from benchmarks.bench_catalogue import lazy_catalogue, measure, seed, set_based_catalogue
+from src.models import Base, Medicine, Prediction
+from src.routes.catalogue import catalogue_query
+
+def make_engine():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    return engine
+
+@pytest.mark.parametrize("n", [1, 10, 200])
+def test_catalogue_is_one_statement(n):
+    engine = make_engine()
+    with Session(engine) as session:
+        seed(session, n)
+
+    catalogue, statements, _ = measure(engine, set_based_catalogue)
+    assert statements == 1
+    assert sorted(catalogue) == sorted(measure(engine, lazy_catalogue)[0])
+
+@pytest.fixture
+def local_timezone(monkeypatch):
+    """A zone ahead of UTC, where the local and UTC clocks disagree by hours"""
+    monkeypatch.setenv("TZ", "Asia/Kolkata")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+def test_catalogue_uses_the_forecast_clock(local_timezone):
+    engine = make_engine()
+    now = datetime.now()
+    with Session(engine) as session:
+        session.add(Medicine(medicine_id=1, name="Paracetamol", category="analgesic", unit="tablet"))
+        session.add_all([
+            Prediction(medicine_id=1, region="delhi", date=now - timedelta(hours=1),
+                       predicted_demand=100.0, confidence_interval=1.0),
+            Prediction(medicine_id=1, region="delhi", date=now + timedelta(hours=1),
+                       predicted_demand=10.0, confidence_interval=1.0),
+        ])
+        session.commit()
+        row = session.execute(catalogue_query(region="delhi")).one()
+    assert row.forecast_demand == 10.0